@@ -1,29 +1,249 @@
 import os
 import json
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+from contextlib import asynccontextmanager
 from typing import Optional
-from openai import OpenAI
+import httpx
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+from .embedding_cache import DEFAULT_PATH, EmbeddingCache, cache_key
+from .response_cache import ResponseCache
+from .prompt_builder import Section, fit_sections
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+EMBEDDING_MODEL = "text-embedding-ada-002"
+CHAT_MODEL = "gpt-4"
+
+# Only the columns the mother-match task reads are sent to the model
+MOTHER_MATCH_FIELDS = {
+    "facilities": ["name", "type", "district", "beds", "capability_score", "services_text"],
+    "ngos": ["name", "district", "focus_areas", "capability_score", "description"],
+    "districts": ["district", "state", "est_mothers_per_year"],
+}
+MOTHER_MATCH_TOKEN_BUDGET = int(os.getenv("MOTHER_MATCH_TOKEN_BUDGET", "2000"))
+
+# name -> {calls, estimated_tokens, prompt_tokens, last}
+prompt_stats: dict[str, dict] = {}
+
+
+# Bump an entry whenever its prompt changes so stale cached answers are not served
+PROMPT_VERSIONS = {"classify_entity": 1, "score_entity": 1, "generate_email": 1, "analyse_entity": 1}
+
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("LLM_CACHE_SIZE", "2048")),
+    ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "86400")),
+)
+
+
+def _response_key(function: str, arguments: dict) -> tuple[str, str]:
+    """(function, sha256 of model + prompt version + whitespace-normalised inputs)"""
+    inputs = {k: " ".join(v.split()) if isinstance(v, str) else v for k, v in arguments.items()}
+    payload = json.dumps([CHAT_MODEL, PROMPT_VERSIONS[function], inputs], sort_keys=True)
+    return function, hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cached_response(function: str):
+    """
+    Serve repeat calls from response_cache. The sync and async variant of a
+    function share entries. use_cache=False skips the lookup but still stores
+    the fresh answer.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def key_for(args, kwargs):
+            return _response_key(function, signature.bind(*args, **kwargs).arguments)
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, use_cache: bool = True, **kwargs):
+                key = key_for(args, kwargs)
+                if use_cache and (hit := response_cache.get(key)) is not None:
+                    return hit
+                result = await fn(*args, **kwargs)
+                response_cache.put(key, result)
+                return result
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, use_cache: bool = True, **kwargs):
+                key = key_for(args, kwargs)
+                if use_cache and (hit := response_cache.get(key)) is not None:
+                    return hit
+                result = fn(*args, **kwargs)
+                response_cache.put(key, result)
+                return result
+        return wrapper
+    return decorator
+
+
+def _parse_model_limits(spec: str) -> dict[str, int]:
+    """"gpt-4=64,text-embedding-ada-002=128" -> {"gpt-4": 64, ...}"""
+    limits = {}
+    for part in spec.split(","):
+        model, _, limit = part.partition("=")
+        if model.strip() and limit.strip():
+            limits[model.strip()] = int(limit)
+    return limits
+
+
+# In-flight LLM requests per worker: a global cap plus optional per-model caps
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "256"))
+LLM_MODEL_CONCURRENCY = _parse_model_limits(os.getenv("LLM_MODEL_CONCURRENCY", "gpt-4=64"))
+
+async_client = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    # The SDK default pool (100 connections) would queue below our own limits
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=LLM_MAX_CONCURRENCY, max_keepalive_connections=64),
+        timeout=httpx.Timeout(600.0, connect=5.0),
+    ),
+)
+_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+@asynccontextmanager
+async def _llm_slot(model: str):
+    """Hold one global slot, and one per-model slot if that model is limited."""
+    if "*" not in _semaphores:
+        _semaphores["*"] = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    limit = LLM_MODEL_CONCURRENCY.get(model)
+    if limit and model not in _semaphores:
+        _semaphores[model] = asyncio.Semaphore(limit)
+
+    async with _semaphores["*"]:
+        if limit:
+            async with _semaphores[model]:
+                yield
+        else:
+            yield
+
+# EMBEDDING_CACHE_PATH="" keeps the cache in memory only
+embedding_cache = EmbeddingCache(
+    path=os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_PATH) or None,
+    max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")),
+)
+
 
 def generate_embedding(text: str) -> list[float]:
     """Generate 1536-dimensional embedding using OpenAI text-embedding-ada-002."""
+    text = text[:8000]  # Truncate to avoid token limits
+    key = cache_key(EMBEDDING_MODEL, text)
+    cached = embedding_cache.get(key)
+    if cached is not None:
+        return list(cached)
+
     response = client.embeddings.create(
-        model="text-embedding-ada-002",
-        input=text[:8000],  # Truncate to avoid token limits
+        model=EMBEDDING_MODEL,
+        input=text,
     )
-    return response.data[0].embedding
+    embedding = response.data[0].embedding
+    embedding_cache.put(key, embedding)
+    return embedding
 
 
-def classify_entity(description: str) -> dict:
+async def generate_embeddings_async(texts: list[str]) -> list[list[float]]:
     """
-    Classify an organization into a predefined type using GPT-4.
-    Returns: { type, confidence, reasoning }
+    Batched generate_embedding_async: cached vectors are reused and all
+    remaining distinct texts go to the API in a single call, holding one
+    embedding-model slot. Output order matches texts.
     """
-    prompt = f"""You are an expert in Indian healthcare and maternal health organizations.
+    texts = [t[:8000] for t in texts]
+    keys = [cache_key(EMBEDDING_MODEL, t) for t in texts]
+
+    def lookup():
+        found = {}
+        for key in keys:
+            if key not in found:
+                cached = embedding_cache.get(key)
+                if cached is not None:
+                    found[key] = cached
+        return found
+
+    found = await asyncio.to_thread(lookup)
+    missing = list(dict.fromkeys(k for k in keys if k not in found))
+    if missing:
+        text_for = dict(zip(keys, texts))
+        async with _llm_slot(EMBEDDING_MODEL):
+            response = await async_client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=[text_for[k] for k in missing],
+            )
+        fresh = {missing[item.index]: item.embedding for item in response.data}
+        found.update(fresh)
+
+        def store():
+            for key, vector in fresh.items():
+                embedding_cache.put(key, vector)
+
+        await asyncio.to_thread(store)
+
+    return [list(found[k]) for k in keys]
+
+
+async def generate_embedding_async(text: str) -> list[float]:
+    """Async generate_embedding, sharing its cache (whose SQLite tier is read and written in a thread)."""
+    text = text[:8000]
+    key = cache_key(EMBEDDING_MODEL, text)
+    cached = await asyncio.to_thread(embedding_cache.get, key)
+    if cached is not None:
+        return list(cached)
+
+    async with _llm_slot(EMBEDDING_MODEL):
+        response = await async_client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=text,
+        )
+    embedding = response.data[0].embedding
+    await asyncio.to_thread(embedding_cache.put, key, embedding)
+    return embedding
+
+
+def record_prompt_usage(name: str, estimated_tokens: int, usage) -> None:
+    """Accumulate per-call prompt token counts: our estimate and the API's count."""
+    stats = prompt_stats.setdefault(name, {"calls": 0, "estimated_tokens": 0, "prompt_tokens": 0})
+    stats["calls"] += 1
+    stats["estimated_tokens"] += estimated_tokens
+    stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+    stats["last"] = {"estimated_tokens": estimated_tokens, "prompt_tokens": getattr(usage, "prompt_tokens", None)}
+    logger.info("%s prompt: %d tokens estimated, %s reported", name, estimated_tokens, stats["last"]["prompt_tokens"])
+
+
+def _chat_json(prompt: str, temperature: float, max_tokens: int, usage_key: Optional[tuple[str, int]] = None) -> dict:
+    response = client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=max_tokens,
+    )
+    if usage_key:
+        record_prompt_usage(*usage_key, response.usage)
+    return json.loads(response.choices[0].message.content.strip())
+
+
+async def _chat_json_async(prompt: str, temperature: float, max_tokens: int, usage_key: Optional[tuple[str, int]] = None) -> dict:
+    async with _llm_slot(CHAT_MODEL):
+        response = await async_client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+    if usage_key:
+        record_prompt_usage(*usage_key, response.usage)
+    return json.loads(response.choices[0].message.content.strip())
+
+
+def _classify_prompt(description: str) -> str:
+    return f"""You are an expert in Indian healthcare and maternal health organizations.
 
 Classify the following organization description into ONE of these categories:
 - PHC (Primary Health Centre)
@@ -46,23 +266,24 @@ Return a JSON object with exactly these fields:
 
 Return ONLY the JSON, no other text."""
 
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.1,
-        max_tokens=300,
-    )
-
-    result = json.loads(response.choices[0].message.content.strip())
-    return result
-
 
-def score_entity(description: str, entity_type: str, district: str) -> dict:
+@_cached_response("classify_entity")
+def classify_entity(description: str) -> dict:
     """
-    Score entity relevance for maternal health pilot.
-    Returns: { score, reasoning }
+    Classify an organization into a predefined type using GPT-4.
+    Returns: { type, confidence, reasoning }
     """
-    prompt = f"""You are evaluating organizations for a maternal health outreach pilot in Andhra Pradesh and Telangana, India.
+    return _chat_json(_classify_prompt(description), temperature=0.1, max_tokens=300)
+
+
+@_cached_response("classify_entity")
+async def classify_entity_async(description: str) -> dict:
+    """Async classify_entity, bounded by the LLM concurrency limits."""
+    return await _chat_json_async(_classify_prompt(description), temperature=0.1, max_tokens=300)
+
+
+def _score_prompt(description: str, entity_type: str, district: str) -> str:
+    return f"""You are evaluating organizations for a maternal health outreach pilot in Andhra Pradesh and Telangana, India.
 
 Score this organization's relevance for a maternal health partnership (0-100).
 
@@ -86,22 +307,73 @@ Return JSON:
 
 Return ONLY the JSON."""
 
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-        max_tokens=400,
-    )
 
-    result = json.loads(response.choices[0].message.content.strip())
-    return result
+@_cached_response("score_entity")
+def score_entity(description: str, entity_type: str, district: str) -> dict:
+    """
+    Score entity relevance for maternal health pilot.
+    Returns: { score, reasoning }
+    """
+    return _chat_json(_score_prompt(description, entity_type, district), temperature=0.2, max_tokens=400)
+
 
+@_cached_response("score_entity")
+async def score_entity_async(description: str, entity_type: str, district: str) -> dict:
+    """Async score_entity, bounded by the LLM concurrency limits."""
+    return await _chat_json_async(_score_prompt(description, entity_type, district), temperature=0.2, max_tokens=400)
 
-def generate_email(organization_name: str, org_type: str) -> dict:
+
+def _analyse_prompt(description: str, district: str) -> str:
+    return f"""You are an expert in Indian healthcare and maternal health organizations, evaluating organizations for a maternal health outreach pilot in Andhra Pradesh and Telangana, India.
+
+For the organization below, do both:
+A. Classify it into ONE of these categories:
+- PHC (Primary Health Centre)
+- Government Hospital
+- Private Hospital
+- Medical College
+- NGO
+- Corporate
+- Funder
+
+B. Score its relevance for a maternal health partnership (0-100), considering:
+1. Maternal health services offered
+2. Women-focused programs
+3. Community outreach capability
+4. Geographic alignment (AP/Telangana focus)
+5. Scale and patient base
+
+Organization Details:
+- District: {district}
+- Description: {description}
+
+Return a JSON object with exactly these fields:
+{{
+  "type": "<category>",
+  "confidence": <integer 0-100>,
+  "score": <integer 0-100>,
+  "reasoning": ["reason 1", "reason 2", "reason 3", "reason 4"]
+}}
+
+Return ONLY the JSON, no other text."""
+
+
+@_cached_response("analyse_entity")
+def analyse_entity(description: str, district: str) -> dict:
     """
-    Generate a professional outreach email for a maternal health partnership.
-    Returns: { subject, body }
+    Classify and score an organization in one GPT-4 call (for ingest).
+    Returns: { type, confidence, score, reasoning }
     """
+    return _chat_json(_analyse_prompt(description, district), temperature=0.1, max_tokens=500)
+
+
+@_cached_response("analyse_entity")
+async def analyse_entity_async(description: str, district: str) -> dict:
+    """Async analyse_entity, bounded by the LLM concurrency limits."""
+    return await _chat_json_async(_analyse_prompt(description, district), temperature=0.1, max_tokens=500)
+
+
+def _email_prompt(organization_name: str, org_type: str) -> str:
     type_context = {
         "Private Hospital": "a private hospital specializing in women and children's health",
         "Government Hospital": "a government hospital serving the public",
@@ -112,7 +384,7 @@ def generate_email(organization_name: str, org_type: str) -> dict:
         "Corporate": "a corporate entity with CSR programs in healthcare",
     }.get(org_type, "a healthcare organization")
 
-    prompt = f"""Write a professional outreach email for a maternal health partnership.
+    return f"""Write a professional outreach email for a maternal health partnership.
 
 Sender: MotherSource AI (maternal health intelligence platform for AP & Telangana)
 Recipient: {organization_name} - {type_context}
@@ -134,64 +406,127 @@ Return JSON:
 
 Return ONLY the JSON."""
 
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
-        max_tokens=800,
-    )
-
-    result = json.loads(response.choices[0].message.content.strip())
-    return result
 
-
-def match_ngos_by_embedding(program_text: str, ngo_embeddings: list[tuple]) -> list[int]:
+@_cached_response("generate_email")
+def generate_email(organization_name: str, org_type: str) -> dict:
     """
-    Match NGOs by semantic similarity using cosine similarity.
-    ngo_embeddings: list of (ngo_id, embedding)
-    Returns: sorted list of ngo_ids by similarity
+    Generate a professional outreach email for a maternal health partnership.
+    Returns: { subject, body }
     """
-    import numpy as np
+    return _chat_json(_email_prompt(organization_name, org_type), temperature=0.7, max_tokens=800)
+
 
-    program_embedding = generate_embedding(program_text)
-    program_vec = np.array(program_embedding)
+@_cached_response("generate_email")
+async def generate_email_async(organization_name: str, org_type: str) -> dict:
+    """Async generate_email, bounded by the LLM concurrency limits."""
+    return await _chat_json_async(_email_prompt(organization_name, org_type), temperature=0.7, max_tokens=800)
 
-    similarities = []
-    for ngo_id, embedding in ngo_embeddings:
-        if embedding is None:
-            continue
-        ngo_vec = np.array(embedding)
-        # Cosine similarity
-        sim = np.dot(program_vec, ngo_vec) / (np.linalg.norm(program_vec) * np.linalg.norm(ngo_vec))
-        similarities.append((ngo_id, float(sim)))
 
-    similarities.sort(key=lambda x: x[1], reverse=True)
-    return [ngo_id for ngo_id, _ in similarities[:10]]
+def _email_stream_prompt(organization_name: str, org_type: str) -> str:
+    # Same brief as _email_prompt, but plain text so the streamed tokens read as an email
+    brief = _email_prompt(organization_name, org_type).split("\n\nReturn JSON:")[0]
+    return f"""{brief}
 
+Format:
+Subject: <email subject line>
 
-def check_duplicate(new_embedding: list[float], existing_embeddings: list[tuple], threshold: float = 0.92) -> Optional[int]:
+<full email body with greeting, paragraphs, bullet points, and signature>
+
+Return ONLY the email in this format, no other text."""
+
+
+def split_email(text: str) -> dict:
+    """'Subject: ...' first line, then the body -> { subject, body }"""
+    text = text.strip()
+    first, _, rest = text.partition("\n")
+    if first.lower().startswith("subject:"):
+        return {"subject": first.split(":", 1)[1].strip(), "body": rest.strip()}
+    return {"subject": "", "body": text}
+
+
+async def stream_email(organization_name: str, org_type: str, use_cache: bool = True):
+    """
+    Async generator of ("token", text) pieces as GPT-4 writes the email,
+    then one ("email", { subject, body }). A cached email (shared with
+    generate_email) is yielded as the final event straight away.
     """
-    Check if a new entity is a duplicate based on embedding similarity.
-    Returns entity_id if duplicate found, else None.
+    key = _response_key("generate_email", {"organization_name": organization_name, "org_type": org_type})
+    if use_cache and (hit := response_cache.get(key)) is not None:
+        yield "email", hit
+        return
+
+    parts = []
+    async with _llm_slot(CHAT_MODEL):
+        stream = await async_client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[{"role": "user", "content": _email_stream_prompt(organization_name, org_type)}],
+            temperature=0.7,
+            max_tokens=800,
+            stream=True,
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield "token", delta
+
+    email = split_email("".join(parts))
+    response_cache.put(key, email)
+    yield "email", email
+
+
+def find_batch_duplicates(embeddings: list[list[float]], threshold: float = 0.92) -> dict[int, int]:
+    """
+    Near-duplicates within one batch, in input order: a vector is a duplicate
+    if it is more similar than threshold to an earlier non-duplicate vector.
+    Returns {position: position of the earlier vector it duplicates}.
     """
     import numpy as np
 
-    new_vec = np.array(new_embedding)
-    for entity_id, embedding in existing_embeddings:
-        if embedding is None:
-            continue
-        existing_vec = np.array(embedding)
-        sim = np.dot(new_vec, existing_vec) / (np.linalg.norm(new_vec) * np.linalg.norm(existing_vec))
-        if sim > threshold:
-            return entity_id
-    return None
-
-
-def match_mother_to_hospital(mother_details: dict, facilities: list[dict], ngos: list[dict], district_context: list[dict]) -> dict:
+    if len(embeddings) < 2:
+        return {}
+    vecs = np.asarray(embeddings, dtype=np.float32)
+    vecs /= np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+
+    kept = np.zeros(len(vecs), dtype=bool)
+    duplicates = {}
+    block = 512  # rows of the similarity matrix held at once
+    for start in range(0, len(vecs), block):
+        stop = min(start + block, len(vecs))
+        sims = vecs[start:stop] @ vecs[:stop].T
+        for i in range(start, stop):
+            row = np.where(kept[:i], sims[i - start, :i], -1.0)
+            if i and row.max() > threshold:
+                duplicates[i] = int(row.argmax())
+            else:
+                kept[i] = True
+    return duplicates
+
+
+def _mother_match_prompt(mother_details: dict, facilities: list[dict], ngos: list[dict], district_context: list[dict]) -> tuple[str, int]:
     """
-    Use AI to match a mother to the best hospital and NGO program using rich CSV data and district context.
+    Datasets are sent as compact tables of only the fields the task reads.
+    Facility and NGO rows are dropped lowest capability first, across both
+    tables, to fit MOTHER_MATCH_TOKEN_BUDGET; district context is sent whole.
+    Returns (prompt, prompt tokens); PromptBudgetError if it cannot fit.
     """
-    prompt = f"""You are a "Maternal Care Integration Specialist" for MotherSource AI. 
+    capability = lambda r: r.get("capability_score") or 0
+    by_score = lambda rows: sorted(rows, key=capability, reverse=True)
+    sections = [
+        Section("facilities", by_score(facilities), MOTHER_MATCH_FIELDS["facilities"], score=capability),
+        Section("ngos", by_score(ngos), MOTHER_MATCH_FIELDS["ngos"], score=capability),
+        Section("districts", district_context, MOTHER_MATCH_FIELDS["districts"]),
+    ]
+    return fit_sections(
+        lambda tables: _render_mother_match_prompt(mother_details, tables),
+        sections,
+        MOTHER_MATCH_TOKEN_BUDGET,
+        CHAT_MODEL,
+    )
+
+
+def _render_mother_match_prompt(mother_details: dict, tables: dict) -> str:
+    return f"""You are a "Maternal Care Integration Specialist" for MotherSource AI. 
 Your goal is to match a mother to the absolute best healthcare facility and provided NGO support using high-precision data.
 
 MOTHER DETAILS:
@@ -200,14 +535,16 @@ MOTHER DETAILS:
 - Yearly Income: {mother_details.get('income')}
 - Expected Due Date: {mother_details.get('dueDate')}
 
+Datasets are pipe-separated tables; the first line of each lists the columns.
+
 DATASET (FACILITIES):
-{json.dumps(facilities, indent=2)}
+{tables["facilities"]}
 
 DATASET (SUPPORTING NGOS):
-{json.dumps(ngos, indent=2)}
+{tables["ngos"]}
 
 REGIONAL CONTEXT (DISTRICTS):
-{json.dumps(district_context, indent=2)}
+{tables["districts"]}
 
 TASK:
 1. CHECK ELIGIBILITY: Analyze 'Yearly Income'. 
@@ -240,11 +577,39 @@ RETURN JSON OBJECT ONLY:
 
 IMPORTANT: Return ONLY the JSON. Be precise. Use the REAL names and data from the provided datasets."""
 
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-        max_tokens=800,
-    )
 
-    return json.loads(response.choices[0].message.content.strip())
+def match_mother_to_hospital(mother_details: dict, facilities: list[dict], ngos: list[dict], district_context: list[dict]) -> dict:
+    """
+    Use AI to match a mother to the best hospital and NGO program using rich CSV data and district context.
+    """
+    prompt, tokens = _mother_match_prompt(mother_details, facilities, ngos, district_context)
+    return _chat_json(prompt, temperature=0.2, max_tokens=800, usage_key=("mother_match", tokens))
+
+
+async def match_mother_to_hospital_async(mother_details: dict, facilities: list[dict], ngos: list[dict], district_context: list[dict]) -> dict:
+    """Async match_mother_to_hospital, bounded by the LLM concurrency limits."""
+    # Token counting is CPU work (and may fetch the tiktoken encoding on first use)
+    prompt, tokens = await asyncio.to_thread(_mother_match_prompt, mother_details, facilities, ngos, district_context)
+    return await _chat_json_async(prompt, temperature=0.2, max_tokens=800, usage_key=("mother_match", tokens))
+
+
+def _match_reasoning_prompt(mother_details: dict, match: dict) -> str:
+    facts = {k: v for k, v in match.items() if k != "reasoning"}
+    return f"""You are a "Maternal Care Integration Specialist" for MotherSource AI.
+A mother has already been matched to a facility and support program. Explain the match to her.
+
+MOTHER: income {mother_details.get('income')}, pincode {mother_details.get('pincode')}, due {mother_details.get('dueDate')}
+MATCH: {json.dumps(facts, separators=(",", ":"), ensure_ascii=False)}
+FACTS: {json.dumps(match.get("reasoning", []), ensure_ascii=False)}
+
+Rewrite the FACTS as exactly 3 short, warm, precise reasons. Do not add facts that are not given.
+
+Return a JSON array of 3 strings ONLY."""
+
+
+async def phrase_match_reasoning_async(mother_details: dict, match: dict) -> list[str]:
+    """GPT-4 phrasing of a locally computed mother match's reasoning."""
+    reasons = await _chat_json_async(_match_reasoning_prompt(mother_details, match), temperature=0.3, max_tokens=300)
+    if not isinstance(reasons, list) or not all(isinstance(r, str) for r in reasons):
+        raise ValueError("Expected a JSON array of strings")
+    return reasons
@@ -0,0 +1,354 @@
+"""
+Bulk loader: streams seed data, the scored CSVs and precomputed embeddings
+into entities / ngos / funders with binary COPY, then upserts on name.
+
+    python -m app.bulk_load seed ngos facilities funders
+
+Rows are COPYed into a temporary staging table (vectors included, in
+pgvector's binary format), de-duplicated by name (last row wins), used to
+update existing rows with the same name where anything changed, and the
+rest are inserted. `name`
+is not unique in the schema, so the upsert is an UPDATE + INSERT under a
+table lock rather than ON CONFLICT. Columns a source leaves empty keep
+their current value on update.
+"""
+import argparse
+import errno
+import io
+import logging
+import math
+import os
+import struct
+import time
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import ARRAY, Float, String, Text
+
+from . import embeddings, reference_data
+from .database import create_vector_indexes
+from .data_sources import SEED_ENTITIES, SEED_FUNDERS, SEED_NGOS
+from .models import NGO, Entity, Funder
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CSV_CHUNK_ROWS = 50_000
+COPY_READ_SIZE = 1 << 20
+
+# Inserting into an HNSW index costs milliseconds per row, so a load that
+# writes at least this many rows, and at least this share of the table,
+# drops the ANN index and builds it once afterwards
+REBUILD_INDEX_MIN_ROWS = 10_000
+REBUILD_INDEX_FRACTION = 0.25
+MAINTENANCE_WORK_MEM = os.getenv("BULK_LOAD_MAINTENANCE_WORK_MEM", "512MB")
+
+MODELS = {"entities": Entity, "ngos": NGO, "funders": Funder}
+
+VARCHAR_OID = 1043
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+
+
+# ─── Binary COPY encoding ─────────────────────────────────────────────────────
+
+def loadable_columns(model) -> list[tuple[str, str]]:
+    """(column, kind) for every column a loader may fill; kind is text / float / array / vector."""
+    columns = []
+    for col in model.__table__.columns:
+        if col.primary_key or col.computed is not None or col.server_default is not None:
+            continue
+        if isinstance(col.type, Vector):
+            kind = "vector"
+        elif isinstance(col.type, ARRAY):
+            kind = "array"
+        elif isinstance(col.type, Float):
+            kind = "float"
+        elif isinstance(col.type, (String, Text)):
+            kind = "text"
+        else:
+            continue
+        columns.append((col.name, kind))
+    return columns
+
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _encode_field(value, kind: str) -> bytes:
+    if _missing(value):
+        return struct.pack(">i", -1)
+    if kind == "text":
+        data = str(value).encode()
+    elif kind == "float":
+        data = struct.pack(">d", float(value))
+    elif kind == "array":
+        items = [str(v).encode() for v in value]
+        data = struct.pack(">iiiii", 1, 0, VARCHAR_OID, len(items), 1) + b"".join(
+            struct.pack(">i", len(item)) + item for item in items
+        )
+    else:  # vector: int16 dim, int16 unused, float4[dim]
+        vec = np.asarray(value, dtype=">f4")
+        data = struct.pack(">hh", len(vec), 0) + vec.tobytes()
+    return struct.pack(">i", len(data)) + data
+
+
+def encode_rows(records: Iterable[dict], columns: list[tuple[str, str]]) -> Iterator[bytes]:
+    """The binary COPY stream for records, one bytes chunk per row."""
+    yield COPY_HEADER
+    count = struct.pack(">h", len(columns))
+    for record in records:
+        yield count + b"".join(_encode_field(record.get(name), kind) for name, kind in columns)
+    yield COPY_TRAILER
+
+
+class _ChunkReader(io.RawIOBase):
+    """File-like view of a bytes iterator, for cursor.copy_expert."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self.chunks = chunks
+        self.pending: list[bytes] = []  # joined once per read, not grown per row
+        self.pending_size = 0
+        self.rows = -2  # header and trailer are chunks too
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or self.pending_size < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.pending.append(chunk)
+            self.pending_size += len(chunk)
+            self.rows += 1
+        data = b"".join(self.pending)
+        if 0 <= size < len(data):
+            data, rest = data[:size], data[size:]
+            self.pending, self.pending_size = [rest], len(rest)
+        else:
+            self.pending, self.pending_size = [], 0
+        return data
+
+
+# ─── Sources ──────────────────────────────────────────────────────────────────
+
+def _split_list(value) -> Optional[list[str]]:
+    if _missing(value):
+        return None
+    return [v.strip() for v in str(value).split(",") if v.strip()]
+
+
+def _priority(relevance: float) -> float:
+    # Same composite as /ingest and /score
+    return (0.5 * relevance) + (0.3 * 75) + (0.2 * 70)
+
+
+def load_embeddings(dataset: Optional[str], dim: int) -> tuple[dict, Optional[np.ndarray], Optional[str]]:
+    """(name -> row, memory-mapped vectors) from the embedding store, or ({}, None, reason they are skipped)."""
+    if not dataset:
+        return {}, None, "no embeddings for this source"
+    index, vectors, meta = embeddings.load(dataset)
+    if vectors is None:
+        return {}, None, f"{dataset} has not been embedded"
+    if vectors.shape[1] != dim:
+        return {}, None, f"{meta['model']} vectors are {vectors.shape[1]}-dimensional, column is vector({dim})"
+    return index, vectors, None
+
+
+def _csv_records(csv_path: str, embedded: Optional[str], to_record, report: dict) -> Iterator[dict]:
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), csv_path)
+    index, vectors, skipped = load_embeddings(embedded, dim=1536)
+    if skipped:
+        report["embeddings_skipped"] = skipped
+        logger.warning("Loading %s without embeddings: %s", os.path.basename(csv_path), skipped)
+
+    # The checks above run on the call, so a missing file fails before any COPY starts
+    def records():
+        for chunk in pd.read_csv(csv_path, chunksize=CSV_CHUNK_ROWS):
+            for row in chunk.to_dict("records"):
+                record = to_record(row)
+                row_id = index.get(str(record["name"]))
+                if row_id is not None:
+                    record["embedding"] = vectors[row_id]
+                yield record
+    return records()
+
+
+def ngo_records(csv_path: str, embedded: Optional[str], report: dict) -> Iterator[dict]:
+    def to_record(r):
+        return {
+            "name": r["name"],
+            "district": r.get("district"),
+            "state": r.get("state"),
+            "description": r.get("description"),
+            "focus_areas": _split_list(r.get("focus_areas")),
+            "alignment_score": r.get("capability_score"),
+        }
+    return _csv_records(csv_path, embedded, to_record, report)
+
+
+def facility_records(csv_path: str, embedded: Optional[str], report: dict) -> Iterator[dict]:
+    districts = reference_data.frame("districts")
+    state_of = dict(zip(districts["district"], districts["state"]))
+
+    def to_record(r):
+        score = r.get("capability_score")
+        return {
+            "name": r["name"],
+            "type": r.get("type"),
+            "district": r.get("district"),
+            "state": state_of.get(r.get("district"), "Andhra Pradesh"),
+            "description": r.get("services_text"),
+            "relevance_score": score,
+            "priority_score": None if _missing(score) else _priority(score),
+        }
+    return _csv_records(csv_path, embedded, to_record, report)
+
+
+def funder_records(csv_path: str, embedded: Optional[str], report: dict) -> Iterator[dict]:
+    def to_record(r):
+        return {
+            "name": r["name"],
+            "type": r.get("type"),
+            "focus_areas": _split_list(r.get("focus_areas")),
+            "geography": r.get("regions", r.get("geography")),
+            "description": r.get("description"),
+            "relevance_score": r.get("relevance_score"),
+        }
+    return _csv_records(csv_path, embedded, to_record, report)
+
+
+# source -> (table, records(report) factory); vectors come from the embeddings.py store, by name
+SOURCES = {
+    "seed": None,  # three tables, see load_source
+    "ngos": ("ngos", lambda report: ngo_records(
+        os.path.join(DATA_DIR, "ngos_scored.csv"), "ngos", report)),
+    "facilities": ("entities", lambda report: facility_records(
+        os.path.join(DATA_DIR, "facilities_scored.csv"), "facilities", report)),
+    "funders": ("funders", lambda report: funder_records(
+        os.path.join(DATA_DIR, "funders.csv"), "funders", report)),
+}
+
+
+# ─── Loading ──────────────────────────────────────────────────────────────────
+
+def copy_upsert(conn, table: str, records: Iterable[dict]) -> dict:
+    """COPY records into table, upserting on name, in one transaction. Returns counts."""
+    columns = loadable_columns(MODELS[table])
+    names = [name for name, _ in columns]
+    stage = f"_load_{table}"
+    start = time.perf_counter()
+
+    with conn.begin():
+        conn.exec_driver_sql("SET LOCAL statement_timeout = 0")  # the pool's per-statement limit is for requests
+        conn.exec_driver_sql(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+        # The loaded columns' exact types (vector(1536), varchar[] ...), no constraints
+        conn.exec_driver_sql(
+            f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {', '.join(names)} FROM {table} WITH NO DATA"
+        )
+        conn.exec_driver_sql(f"ALTER TABLE {stage} ADD COLUMN _seq bigserial")
+        stream = _ChunkReader(encode_rows(records, columns))
+        with conn.connection.cursor() as cur:
+            cur.copy_expert(
+                f"COPY {stage} ({', '.join(names)}) FROM STDIN WITH (FORMAT binary)", stream, size=COPY_READ_SIZE
+            )
+        copied = stream.rows
+
+        conn.exec_driver_sql(
+            f"CREATE TEMP TABLE {stage}_latest ON COMMIT DROP AS "
+            f"SELECT DISTINCT ON (name) * FROM {stage} ORDER BY name, _seq DESC"
+        )
+        # Only rows whose merged values differ get written: an unchanged re-load
+        # touches nothing, and every rewritten row costs an ANN index insert
+        merged = ", ".join(f"COALESCE(s.{n}, t.{n})" for n in names if n != "name")
+        current = ", ".join(f"t.{n}" for n in names if n != "name")
+        conn.exec_driver_sql(
+            f"CREATE TEMP TABLE {stage}_changed ON COMMIT DROP AS SELECT s.* FROM {stage}_latest s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.name = s.name "
+            f"AND ROW({current}) IS NOT DISTINCT FROM ROW({merged}))"
+        )
+        changes = conn.exec_driver_sql(f"SELECT count(*) FROM {stage}_changed").scalar()
+        existing = conn.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar()
+        rebuild = changes >= REBUILD_INDEX_MIN_ROWS and changes >= REBUILD_INDEX_FRACTION * (existing + changes)
+        if rebuild:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS ix_{table}_embedding_cosine")
+
+        updated = conn.exec_driver_sql(
+            f"UPDATE {table} t SET "
+            + ", ".join(f"{n} = COALESCE(s.{n}, t.{n})" for n in names if n != "name")
+            + f" FROM {stage}_changed s WHERE t.name = s.name"
+        ).rowcount
+        inserted = conn.exec_driver_sql(
+            f"INSERT INTO {table} ({', '.join(names)}) "
+            f"SELECT {', '.join('s.' + n for n in names)} FROM {stage}_changed s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.name = s.name)"
+        ).rowcount
+
+        loaded = time.perf_counter()
+        if rebuild:
+            conn.exec_driver_sql(f"SET LOCAL maintenance_work_mem = '{MAINTENANCE_WORK_MEM}'")
+            create_vector_indexes(conn, tables=(table,))
+
+    seconds = loaded - start  # rows/sec covers COPY + upsert; index build is reported apart
+    return {
+        "table": table,
+        "rows": copied,
+        "inserted": inserted,
+        "updated": updated,
+        "index_rebuilt": rebuild,
+        "seconds": round(seconds, 3),
+        "index_seconds": round(time.perf_counter() - loaded, 3),
+        "rows_per_sec": round(copied / seconds) if seconds else copied,
+    }
+
+
+def load_source(engine, source: str) -> list[dict]:
+    """Load one source; one report per table it fills."""
+    if source not in SOURCES:
+        raise ValueError(f"Unknown source: {source} (expected one of {', '.join(SOURCES)})")
+    with engine.connect() as conn:
+        if source == "seed":
+            plan = [("entities", SEED_ENTITIES, {}), ("ngos", SEED_NGOS, {}), ("funders", SEED_FUNDERS, {})]
+        else:
+            table, factory = SOURCES[source]
+            report = {}
+            plan = [(table, factory(report), report)]
+
+        results = []
+        for table, records, report in plan:
+            result = copy_upsert(conn, table, records)
+            results.append({"source": source, **result, **report})
+            logger.info("%s -> %s: %s rows in %ss (%s rows/s)", source, table,
+                        result["rows"], result["seconds"], result["rows_per_sec"])
+        return results
+
+
+def load_sources(engine, sources: list[str]) -> list[dict]:
+    results = []
+    for source in sources:
+        results.extend(load_source(engine, source))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load reference data into Postgres with COPY.")
+    parser.add_argument("sources", nargs="+", choices=list(SOURCES))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from .database import engine, init_db
+    init_db()
+    for r in load_sources(engine, args.sources):
+        print(f"{r['source']:>10} -> {r['table']:<8} {r['rows']:>9} rows  "
+              f"{r['inserted']:>9} inserted  {r['updated']:>9} updated  "
+              f"{r['seconds']:>8.2f}s  {r['rows_per_sec']:>9} rows/s"
+              + (f"  (embeddings skipped: {r['embeddings_skipped']})" if "embeddings_skipped" in r else ""))
+
+
+if __name__ == "__main__":
+    main()
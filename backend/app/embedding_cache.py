@@ -0,0 +1,88 @@
+"""
+Two-tier cache for embedding vectors, keyed by sha256(model, text):
+an in-process LRU in front of a SQLite file shared by all workers.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "embedding_cache.sqlite3")
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, max_entries: int = 4096):
+        self.path = path
+        self.max_entries = max_entries
+        self._lru: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    def _db(self):
+        if self._conn is None and self.path:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")  # concurrent readers across workers
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, vector: list[float]):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[list[float]]:
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits["memory"] += 1
+                return self._lru[key]
+            try:
+                db = self._db()
+                row = db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone() if db else None
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            vector = array("d", row[0]).tolist()
+            self._remember(key, vector)
+            self.hits["disk"] += 1
+            return vector
+
+    def put(self, key: str, vector: list[float]):
+        with self._lock:
+            self._remember(key, vector)
+            try:
+                db = self._db()
+                if db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                        (key, array("d", vector).tobytes()),
+                    )
+                    db.commit()
+            except sqlite3.Error:
+                pass  # the persistent tier is best-effort; memory still holds it
+
+    def stats(self) -> dict:
+        lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+        return {
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._lru),
+        }
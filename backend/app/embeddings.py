@@ -1,42 +1,264 @@
-import pandas as pd
-import numpy as np
-from sentence_transformers import SentenceTransformer
+"""
+Sentence-transformer embeddings for the NGO, facility and funder CSVs.
+
+    python embeddings.py [ngos facilities funders] [--batch-size 64] [--workers 4]
+
+Runs are incremental. Each dataset keeps an append-only float32 vector file
+and a manifest listing every CSV row's id, text hash and vector row. A run
+streams the CSV in chunks, hashes each row's text and encodes only rows that
+are new or whose text changed. Their vectors are appended, and a new manifest
+is swapped in. Unchanged rows keep their vectors, so a refresh costs time in
+proportion to what changed. Once superseded vectors make up more than half
+the file, it is rewritten as a new generation.
+"""
+import argparse
+import hashlib
+import json
 import logging
+import os
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 MODEL_NAME = 'all-MiniLM-L6-v2'
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+CHUNK_ROWS = 10_000
+BATCH_SIZE = 64
+COMPACT_BELOW = 0.5  # live share of the vector file that triggers a rewrite
+
+# dataset -> (CSV, id column, text columns, output prefix)
+DATASETS = {
+    "ngos": ("ngos_300.csv", "name", ("focus_areas", "description"), "ngo_embeddings"),
+    "facilities": ("facilities_200.csv", "name", ("type", "services_text"), "facility_embeddings"),
+    "funders": ("funders.csv", "name", ("focus_areas", "description"), "funder_embeddings"),
+}
+
+
+# ─── Store ────────────────────────────────────────────────────────────────────
+
+def manifest_path(dataset: str) -> str:
+    return os.path.join(DATA_DIR, DATASETS[dataset][3] + ".manifest.arrow")
+
+
+def vectors_path(dataset: str, generation: int) -> str:
+    return os.path.join(DATA_DIR, f"{DATASETS[dataset][3]}.{generation}.f32")
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def read_manifest(dataset: str) -> tuple[Optional[pa.Table], dict]:
+    """(id/hash/row table, metadata) of dataset's last run, or (None, {})."""
+    try:
+        table = pa.ipc.open_file(pa.memory_map(manifest_path(dataset))).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None, {}
+    return table, json.loads(table.schema.metadata[b"store"])
+
+
+def write_manifest(dataset: str, ids: list, hashes: list, rows: list, meta: dict):
+    table = pa.table(
+        {"id": pa.array(ids, pa.string()), "hash": pa.array(hashes, pa.binary(16)), "row": pa.array(rows, pa.int64())},
+        metadata={b"store": json.dumps(meta).encode()},
+    )
+    dest = manifest_path(dataset)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, dest)
+
+
+def open_vectors(path: str, dim: int) -> np.ndarray:
+    """Read-only memory map of a vector file, (n, dim) float32."""
+    n = os.path.getsize(path) // (dim * 4) if os.path.exists(path) else 0
+    if n == 0:
+        return np.empty((0, dim), dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode="r", shape=(n, dim))
+
+
+def load(dataset: str) -> tuple[dict[str, int], Optional[np.ndarray], dict]:
+    """
+    (id -> vector row, memory-mapped vectors, metadata) for dataset.
+    Vectors are None if it has not been embedded yet.
+    """
+    table, meta = read_manifest(dataset)
+    if table is None or not meta.get("dim"):
+        return {}, None, meta
+    index = dict(zip(table.column("id").to_pylist(), table.column("row").to_pylist()))
+    return index, open_vectors(vectors_path(dataset, meta["generation"]), meta["dim"]), meta
+
+
+def vectors_for(dataset: str, ids: Iterable[str]) -> np.ndarray:
+    """Vectors for ids, in order. KeyError for an id that has not been embedded."""
+    index, vectors, _ = load(dataset)
+    if vectors is None:
+        raise KeyError(f"{dataset} has not been embedded; run embeddings.py")
+    return vectors[[index[str(i)] for i in ids]]
+
+
+# ─── Encoding ─────────────────────────────────────────────────────────────────
+
+class Encoder:
+    """Loads the model on first use, so a run with nothing to encode never does."""
+
+    def __init__(self, model_name: str = MODEL_NAME, batch_size: int = BATCH_SIZE, workers: int = 1):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.workers = workers
+        self._model = None
+        self._pool = None
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"Loading ML Model: {self.model_name}...")
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+            if self.workers > 1:
+                self._pool = self._model.start_multi_process_pool(["cpu"] * self.workers)
+        if self._pool is not None and len(texts) > self.batch_size:
+            vectors = self._model.encode_multi_process(texts, self._pool, batch_size=self.batch_size)
+        else:
+            vectors = self._model.encode(texts, batch_size=self.batch_size, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def close(self):
+        if self._pool is not None:
+            self._model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+
+def row_texts(chunk: pd.DataFrame, columns) -> list[str]:
+    texts = chunk[columns[0]].fillna('').astype(str)
+    for column in columns[1:]:
+        texts = texts + " " + chunk[column].fillna('').astype(str)
+    return texts.tolist()
+
+
+def _compact(dataset: str, meta: dict, rows: list[int]) -> list[int]:
+    """Copy the live vectors, in manifest order, into the next generation; returns their new rows."""
+    old = open_vectors(vectors_path(dataset, meta["generation"]), meta["dim"])
+    live = np.unique(rows)
+    meta["generation"] += 1
+    with open(vectors_path(dataset, meta["generation"]), "wb") as out:
+        for start in range(0, len(live), CHUNK_ROWS):
+            out.write(np.ascontiguousarray(old[live[start:start + CHUNK_ROWS]]).tobytes())
+        out.flush()
+        os.fsync(out.fileno())
+    return np.searchsorted(live, rows).tolist()
+
+
+def update(dataset: str, encoder: Encoder, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """Embed dataset's new and changed rows. Returns counts."""
+    csv, id_column, text_columns, _ = DATASETS[dataset]
+    start = time.perf_counter()
+    table, meta = read_manifest(dataset)
+    superseded = vectors_path(dataset, meta["generation"]) if table is not None else None
+    fresh = table is None or meta.get("model") != encoder.model_name or not meta.get("dim")
+    if not fresh:
+        current = vectors_path(dataset, meta["generation"])
+        stored = os.path.getsize(current) // (meta["dim"] * 4) if os.path.exists(current) else 0
+        if stored <= max(table.column("row").to_pylist(), default=-1):
+            logger.warning(f"{os.path.basename(current)} is missing or shorter than the manifest; re-encoding {dataset}")
+            fresh = True
+    if fresh:
+        # First run, a different model, or lost vectors: start a new, empty generation
+        previous = {}
+        meta = {"model": encoder.model_name, "dim": None, "generation": meta.get("generation", -1) + 1}
+        stored = 0
+    else:
+        previous = dict(zip(table.column("id").to_pylist(),
+                            zip(table.column("hash").to_pylist(), table.column("row").to_pylist())))
+        # Drop a partial row a crashed run may have left behind
+        os.truncate(current, stored * meta["dim"] * 4)
+
+    path = vectors_path(dataset, meta["generation"])
+    ids, hashes, rows = [], [], []
+    encoded = 0
+    with open(path, "wb" if fresh else "ab") as out:
+        for chunk in pd.read_csv(os.path.join(DATA_DIR, csv), chunksize=chunk_rows,
+                                 usecols=[id_column, *text_columns]):
+            texts = row_texts(chunk, text_columns)
+            chunk_ids = chunk[id_column].astype(str).tolist()
+            todo = []
+            for i, (row_id, text) in enumerate(zip(chunk_ids, texts)):
+                h = text_hash(text)
+                known = previous.get(row_id)
+                if known is not None and known[0] == h:
+                    rows.append(known[1])
+                else:
+                    rows.append(-1)
+                    todo.append(i)
+                hashes.append(h)
+            ids.extend(chunk_ids)
+
+            if todo:
+                vectors = encoder.encode([texts[i] for i in todo])
+                meta["dim"] = vectors.shape[1]
+                out.write(np.ascontiguousarray(vectors).tobytes())
+                base = len(rows) - len(chunk_ids)
+                for k, i in enumerate(todo):
+                    rows[base + i] = stored + k
+                stored += len(todo)
+                encoded += len(todo)
+        out.flush()
+        os.fsync(out.fileno())
+
+    compacted = bool(stored) and len(set(rows)) < COMPACT_BELOW * stored
+    if compacted:
+        rows = _compact(dataset, meta, rows)
+    write_manifest(dataset, ids, hashes, rows, meta)
+    # Open memory maps keep reading the generation they mapped
+    for stale in {superseded, path} - {vectors_path(dataset, meta["generation"]), None}:
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    removed = len(previous.keys() - set(ids))
+    return {
+        "dataset": dataset,
+        "rows": len(ids),
+        "encoded": encoded,
+        "reused": len(ids) - encoded,
+        "removed": removed,
+        "compacted": compacted,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def generate_embeddings(datasets=tuple(DATASETS), batch_size: int = BATCH_SIZE,
+                        workers: int = 1, chunk_rows: int = CHUNK_ROWS) -> list[dict]:
+    encoder = Encoder(batch_size=batch_size, workers=workers)
+    results = []
+    try:
+        for dataset in datasets:
+            logger.info(f"Embedding {dataset}...")
+            result = update(dataset, encoder, chunk_rows)
+            logger.info(f"{dataset}: {result['encoded']} encoded, {result['reused']} unchanged, "
+                        f"{result['removed']} removed in {result['seconds']}s")
+            results.append(result)
+    finally:
+        encoder.close()
+    logger.info("✅ All embeddings up to date in data/ folder.")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally embed the NGO, facility and funder CSVs.")
+    parser.add_argument("datasets", nargs="*", choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="encoding processes (1 encodes in this process)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    generate_embeddings(args.datasets, args.batch_size, args.workers, args.chunk_rows)
 
-def generate_embeddings():
-    logger.info(f"Loading ML Model: {MODEL_NAME}...")
-    model = SentenceTransformer(MODEL_NAME)
-    
-    # Process NGOs
-    logger.info("Loading NGO data...")
-    ngos = pd.read_csv('data/ngos_300.csv')
-    ngo_texts = (ngos['focus_areas'].fillna('') + " " + ngos['description'].fillna('')).tolist()
-    logger.info("Embedding NGOs...")
-    ngo_embeddings = model.encode(ngo_texts, show_progress_bar=True)
-    np.save('data/ngo_embeddings.npy', ngo_embeddings)
-    
-    # Process Facilities
-    logger.info("Loading Facilities data...")
-    facilities = pd.read_csv('data/facilities_200.csv')
-    fac_texts = (facilities['type'].fillna('') + " " + facilities['services_text'].fillna('')).tolist()
-    logger.info("Embedding Facilities...")
-    fac_embeddings = model.encode(fac_texts, show_progress_bar=True)
-    np.save('data/facility_embeddings.npy', fac_embeddings)
-    
-    # Process Funders
-    logger.info("Loading Funders data...")
-    funders = pd.read_csv('data/funders.csv')
-    funder_texts = (funders['focus_areas'].fillna('') + " " + funders['description'].fillna('')).tolist()
-    logger.info("Embedding Funders...")
-    funder_embeddings = model.encode(funder_texts, show_progress_bar=True)
-    np.save('data/funder_embeddings.npy', funder_embeddings)
-    
-    logger.info("✅ All embeddings generated and saved to data/ folder.")
 
 if __name__ == "__main__":
-    generate_embeddings()
+    main()
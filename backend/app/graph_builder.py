@@ -1,14 +1,37 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import deque
+
+import numpy as np
 import pandas as pd
 import networkx as nx
 from geopy.distance import geodesic
 
-NGO_FILE = "data/ngos_scored.csv"
-FAC_FILE = "data/facilities_scored.csv"
-FUND_FILE = "data/funders.csv"
+# Resolved next to this module so the API (run from backend/) and the data
+# scripts (run from app/) read the same files
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+NGO_FILE = os.path.join(DATA_DIR, "ngos_scored.csv")
+FAC_FILE = os.path.join(DATA_DIR, "facilities_scored.csv")
+FUND_FILE = os.path.join(DATA_DIR, "funders.csv")
 
-DISTRICT_FILE = "data/districts_59.csv"
+DISTRICT_FILE = os.path.join(DATA_DIR, "districts_59.csv")
+SNAPSHOT_FILE = os.path.join(DATA_DIR, "graph_snapshot.pkl")
+SNAPSHOT_VERSION = 2  # bump when build_graph output changes shape
 MAX_KM = 60  # edge distance cutoff
 
+EARTH_RADIUS_KM = 6371.0088
+# Haversine is within ~0.5% of the WGS-84 geodesic, so pairs inside this
+# widened radius are re-measured exactly before the MAX_KM cutoff is applied.
+HAVERSINE_SLACK = 1.01
+PAIR_BLOCK = 2048  # NGO rows per distance matrix, bounds memory per district
+MAX_CACHED_VIEWS = 1024  # ReactFlow payloads kept per loaded graph
+
+# Graph held by this process plus the ReactFlow payloads derived from it
+_loaded = {"fingerprint": None, "graph": None, "views": {}}
+
 def load_scored_data():
     ngos = pd.read_csv(NGO_FILE)
     facs = pd.read_csv(FAC_FILE)
@@ -59,56 +82,298 @@ def build_graph():
     # NGO–Facility edges (same district + within MAX_KM)
     ngo_nodes = [n for n, d in G.nodes(data=True) if d["kind"] == "NGO"]
     fac_nodes = [n for n, d in G.nodes(data=True) if d["kind"] == "FACILITY"]
-
-    for n in ngo_nodes:
-        nd = G.nodes[n]
-        for f in fac_nodes:
-            fd = G.nodes[f]
-            if nd["district"] != fd["district"]:
-                continue
-            dist_km = geodesic((nd["lat"], nd["lon"]), (fd["lat"], fd["lon"])).km
-            if dist_km <= MAX_KM:
-                G.add_edge(n, f, kind="CARE_CHAIN", distance_km=round(dist_km, 1))
+    add_care_chain_edges(G, ngo_nodes, fac_nodes)
 
     # Funder edges (focus overlap, India/Global)
-    for fund in [n for n, d in G.nodes(data=True) if d["kind"] == "FUNDER"]:
-        fd = G.nodes[fund]
-        for other in ngo_nodes + fac_nodes:
-            od = G.nodes[other]
-            if any(
-                kw.lower() in od.get("focus", od.get("type", "")).lower()
-                for kw in fd["focus"].split(",")
-            ):
-                G.add_edge(fund, other, kind="FUNDING")
+    fund_nodes = [n for n, d in G.nodes(data=True) if d["kind"] == "FUNDER"]
+    add_funding_edges(G, fund_nodes, ngo_nodes + fac_nodes)
 
+    G.graph["district_index"] = build_district_index(G)
     return G
 
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_fingerprint(paths=(NGO_FILE, FAC_FILE, FUND_FILE), with_hash=True):
+    """{path: (size, mtime_ns, sha256)} for the CSVs the graph is built from."""
+    fp = {}
+    for path in paths:
+        st = os.stat(path)
+        fp[path] = (st.st_size, st.st_mtime_ns, _file_hash(path) if with_hash else None)
+    return fp
+
+
+def _fingerprint_matches(saved, paths):
+    """
+    Size + mtime equal -> unchanged without reading the files. Otherwise the
+    content hash decides, so a touched-but-identical CSV doesn't force a rebuild.
+    """
+    quick = source_fingerprint(paths, with_hash=False)
+    if set(saved) != set(quick):
+        return False
+    if all(saved[p][:2] == quick[p][:2] for p in paths):
+        return True
+    return all(
+        saved[p][0] == quick[p][0] and saved[p][2] == _file_hash(p) for p in paths
+    )
+
+
+def _write_snapshot(G, fingerprint, path):
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(
+                {"version": SNAPSHOT_VERSION, "fingerprint": fingerprint, "graph": G},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, path)  # atomic, concurrent workers never see a partial file
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_graph(snapshot_path=SNAPSHOT_FILE, paths=(NGO_FILE, FAC_FILE, FUND_FILE)):
+    """
+    Returns the graph from the on-disk snapshot when the source CSVs are
+    unchanged, otherwise rebuilds it with build_graph() and saves a new snapshot.
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            snap = pickle.load(f)
+        if snap.get("version") == SNAPSHOT_VERSION and _fingerprint_matches(
+            snap["fingerprint"], paths
+        ):
+            return snap["graph"]
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError):
+        pass
+
+    fingerprint = source_fingerprint(paths)
+    G = build_graph()
+    try:
+        _write_snapshot(G, fingerprint, snapshot_path)
+    except OSError:
+        pass  # read-only deploys still get a graph, just without the cache
+    return G
+
+
+def haversine_matrix(lat1, lon1, lat2, lon2):
+    """Great-circle distances in km between every point of set 1 and set 2."""
+    lat1, lon1 = np.radians(lat1)[:, None], np.radians(lon1)[:, None]
+    lat2, lon2 = np.radians(lat2)[None, :], np.radians(lon2)[None, :]
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _group_by_district(G, nodes):
+    groups = {}
+    for n in nodes:
+        district = G.nodes[n]["district"]
+        if district != district:  # NaN never equals itself, so never pairs
+            continue
+        groups.setdefault(district, []).append(n)
+    return groups
+
+
+def add_care_chain_edges(G, ngo_nodes, fac_nodes, max_km=MAX_KM):
+    """
+    Adds CARE_CHAIN edges between NGOs and facilities of the same district.
+
+    Each district is measured with one vectorised haversine matrix; only the
+    pairs that survive the (slightly widened) cutoff are re-measured with
+    geodesic, so edges and distance_km match the per-pair geodesic exactly.
+    Edges are added in NGO order, then facility order, like the nested loop.
+    """
+    fac_groups = _group_by_district(G, fac_nodes)
+
+    for district, ngos in _group_by_district(G, ngo_nodes).items():
+        facs = fac_groups.get(district)
+        if not facs:
+            continue
+        fac_lat = np.array([G.nodes[f]["lat"] for f in facs])
+        fac_lon = np.array([G.nodes[f]["lon"] for f in facs])
+
+        for start in range(0, len(ngos), PAIR_BLOCK):
+            block = ngos[start:start + PAIR_BLOCK]
+            ngo_lat = np.array([G.nodes[n]["lat"] for n in block])
+            ngo_lon = np.array([G.nodes[n]["lon"] for n in block])
+            approx = haversine_matrix(ngo_lat, ngo_lon, fac_lat, fac_lon)
+
+            # np.nonzero walks row-major: NGO order, then facility order
+            for i, j in zip(*np.nonzero(approx <= max_km * HAVERSINE_SLACK)):
+                dist_km = geodesic(
+                    (ngo_lat[i], ngo_lon[i]), (fac_lat[j], fac_lon[j])
+                ).km
+                if dist_km <= max_km:
+                    G.add_edge(
+                        block[i], facs[j], kind="CARE_CHAIN", distance_km=round(dist_km, 1)
+                    )
+
+
+def build_keyword_index(G, nodes):
+    """
+    Groups nodes by their normalised (lowercased) focus text, falling back to
+    facility type. Many organisations share the same focus string, so keyword
+    matching runs once per distinct text instead of once per node.
+    Returns {text: [position in nodes, ...]}.
+    """
+    index = {}
+    for pos, n in enumerate(nodes):
+        nd = G.nodes[n]
+        index.setdefault(nd.get("focus", nd.get("type", "")).lower(), []).append(pos)
+    return index
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a set of keywords: find(text) returns every
+    keyword that occurs in text as a substring, in one pass over the text
+    however many keywords there are.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        goto, fail, out = [{}], [0], [[]]
+        for k, kw in enumerate(self.keywords):
+            state = 0
+            for ch in kw:
+                if ch not in goto[state]:
+                    goto[state][ch] = len(goto)
+                    goto.append({})
+                    fail.append(0)
+                    out.append([])
+                state = goto[state][ch]
+            out[state].append(k)
+
+        # Breadth first, so a state's failure link (a shorter suffix) is final before its children use it
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in goto[state].items():
+                queue.append(child)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0)
+                out[child] = out[child] + out[fail[child]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def find(self, text: str) -> set:
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set(out[0])  # the empty keyword matches any text
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            found.update(out[state])
+        return {self.keywords[k] for k in found}
+
+
+def add_funding_edges(G, fund_nodes, target_nodes):
+    """
+    Adds FUNDING edges from each funder to every NGO/facility whose focus text
+    contains one of the funder's comma-separated keywords (substring match,
+    case-insensitive). All funders' keywords go into one automaton that scans
+    each distinct focus text once; edges keep the target order of the
+    original funder x node loop.
+    """
+    index = build_keyword_index(G, target_nodes)
+    keywords = {fund: [kw.lower() for kw in G.nodes[fund]["focus"].split(",")] for fund in fund_nodes}
+    automaton = KeywordAutomaton(kw for kws in keywords.values() for kw in kws)
+
+    matches = {}
+    for text, positions in index.items():
+        for kw in automaton.find(text):
+            matches.setdefault(kw, []).extend(positions)
+
+    for fund in fund_nodes:
+        hits = set()
+        for kw in keywords[fund]:
+            hits.update(matches.get(kw, ()))
+        for pos in sorted(hits):
+            G.add_edge(fund, target_nodes[pos], kind="FUNDING")
+
+
+def build_district_index(G):
+    """
+    district -> {"NGO": [...], "FACILITY": [...]} with nodes ordered by score
+    (highest first, ties in graph order), plus each funder's graph position
+    under "funder_order" so subgraphs list funders deterministically.
+    """
+    index = {}
+    funder_order = {}
+    for pos, (n, d) in enumerate(G.nodes(data=True)):
+        kind = d.get("kind")
+        if kind == "FUNDER":
+            funder_order[n] = pos
+        elif kind in ("NGO", "FACILITY"):
+            index.setdefault(d.get("district"), {"NGO": [], "FACILITY": []})[kind].append(n)
+
+    for kinds in index.values():
+        for nodes in kinds.values():
+            nodes.sort(key=lambda n: G.nodes[n].get("score", 0), reverse=True)
+    return {"districts": index, "funder_order": funder_order}
+
+
 def subgraph_for_district(G, district: str, max_ngos=5, max_facs=3):
     """
     Filters the graph to only the top-scoring entities for the district
     so the frontend ReactFlow looks clean and not like a barcode.
     """
-    # 1. Get all nodes in district
-    district_ngos = [n for n, d in G.nodes(data=True) if d.get("district") == district and d.get("kind") == "NGO"]
-    district_facs = [n for n, d in G.nodes(data=True) if d.get("district") == district and d.get("kind") == "FACILITY"]
-    all_funders = [n for n, d in G.nodes(data=True) if d.get("kind") == "FUNDER"]
-
-    # 2. Sort by score and take top N
-    top_ngos = sorted(district_ngos, key=lambda n: G.nodes[n].get("score", 0), reverse=True)[:max_ngos]
-    top_facs = sorted(district_facs, key=lambda n: G.nodes[n].get("score", 0), reverse=True)[:max_facs]
-    
-    # We only want funders that actually have an edge to our top NGOs/Facilities
-    valid_funders = []
-    for f in all_funders:
-        has_edge = any(G.has_edge(f, target) for target in top_ngos + top_facs)
-        if has_edge:
-            valid_funders.append(f)
+    index = G.graph.get("district_index") or build_district_index(G)
+
+    # 1. Top N per kind straight from the score-ordered index
+    kinds = index["districts"].get(district, {"NGO": [], "FACILITY": []})
+    top_ngos = kinds["NGO"][:max_ngos]
+    top_facs = kinds["FACILITY"][:max_facs]
+
+    # 2. Only funders that actually have an edge to our top NGOs/Facilities
+    funder_order = index["funder_order"]
+    valid_funders = sorted(
+        {n for target in top_ngos + top_facs for n in G.adj[target] if n in funder_order},
+        key=funder_order.get,
+    )
 
     # 3. Build sub-graph
     keep_nodes = top_ngos + top_facs + valid_funders
     return G.subgraph(keep_nodes).copy()
 
 
+def get_graph():
+    """
+    Process-wide graph. load_graph() runs on first use and again only when a
+    source CSV's size or mtime changes; ReactFlow views are dropped with it.
+    """
+    quick = source_fingerprint(with_hash=False)
+    if _loaded["graph"] is None or quick != _loaded["fingerprint"]:
+        _loaded["graph"] = load_graph()
+        _loaded["fingerprint"] = quick
+        _loaded["views"] = {}
+    return _loaded["graph"]
+
+
+def district_reactflow(district: str, max_ngos=5, max_facs=3):
+    """ReactFlow payload for a district subgraph, cached per (district, max_ngos, max_facs)."""
+    G = get_graph()
+    views = _loaded["views"]
+    key = (district, max_ngos, max_facs)
+    if key not in views:
+        if len(views) >= MAX_CACHED_VIEWS:
+            views.clear()
+        views[key] = graph_to_reactflow(subgraph_for_district(G, district, max_ngos, max_facs))
+    return views[key]
+
+
 def graph_to_reactflow(G_sub):
     nodes = []
     edges = []
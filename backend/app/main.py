@@ -1,32 +1,46 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException
+import json
+import logging
+import time
+from datetime import datetime
+from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, values, column, cast, select, insert, func, true, Integer, Text, REAL
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from openai import OpenAIError
+from pgvector.sqlalchemy import Vector
+import asyncio
+from fastapi.concurrency import run_in_threadpool
+from typing import Generic, Literal, Optional, TypeVar
 from dotenv import load_dotenv
 import pandas as pd
 
-# Files are in app/data relative to the backend root where uvicorn runs
-NGO_SCORED = pd.read_csv("app/data/ngos_scored.csv")
-FAC_SCORED = pd.read_csv("app/data/facilities_scored.csv")
-DISTRICT_DATA = pd.read_csv("app/data/districts_59.csv")
-
-load_dotenv()
-DISTRICT_DATA = pd.read_csv("app/data/districts_59.csv")
-
 load_dotenv()
 
-from .database import get_db, init_db
+from .database import async_engine, engine, get_async_db, get_db, init_db, pool_metrics
 from .models import Entity, NGO, Funder
-from . import ai_engine
-from .data_sources import SEED_ENTITIES, SEED_NGOS, SEED_FUNDERS
+from . import ai_engine, bulk_load, graph_builder, priority_ranking, reference_data
+from . import mother_match as mother_match_engine
+from .vector_index import ngo_index
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, keyset_page, keyset_select
+
+EMBED_BATCH_SIZE = 100  # inputs per embeddings API call
+DUPLICATE_QUERY_CHUNK = 500  # probe vectors per nearest-neighbour query
+SUMMARY_TTL = float(os.getenv("SUMMARY_TTL", "30"))  # seconds /stats and /heatmap may serve a cached summary
+
+_summaries: dict[str, tuple[float, object]] = {}
+_summary_locks: dict[str, asyncio.Lock] = {}
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="MotherSource AI API",
     description="AI-Powered Maternal Health Outreach & Funding Intelligence",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -47,6 +61,11 @@ async def startup_event():
         print(f"DB init warning: {e}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await async_engine.dispose()
+
+
 # ─── Pydantic Schemas ─────────────────────────────────────────────────────────
 
 class IngestRequest(BaseModel):
@@ -60,6 +79,11 @@ class IngestRequest(BaseModel):
     phone: Optional[str] = None
 
 
+class BatchIngestRequest(BaseModel):
+    # Raw dicts so one malformed spreadsheet row is reported, not a 422 for all
+    records: list[dict] = Field(..., min_length=1, max_length=5000)
+
+
 class ClassifyRequest(BaseModel):
     description: str
 
@@ -68,15 +92,85 @@ class ScoreRequest(BaseModel):
     entity_id: int
 
 
+# substring: ILIKE '%term%' (trigram indexes); fulltext: stemmed match ranked by ts_rank
+SearchMode = Literal["substring", "fulltext"]
+
+
 class SearchRequest(BaseModel):
     state: Optional[str] = None
     district: Optional[str] = None
     type: Optional[str] = None
     query: Optional[str] = None
+    mode: SearchMode = "substring"
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+
+
+# Response schemas: every listed field is a column to load; embeddings never are
+
+class EntityOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    type: Optional[str] = None
+    district: Optional[str] = None
+    state: Optional[str] = None
+    address: Optional[str] = None
+    website: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    description: Optional[str] = None
+    relevance_score: Optional[float] = None
+    priority_score: Optional[float] = None
+    created_at: Optional[datetime] = None
+
+
+class NGOOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    district: Optional[str] = None
+    state: Optional[str] = None
+    focus_areas: Optional[list[str]] = None
+    website: Optional[str] = None
+    description: Optional[str] = None
+    alignment_score: Optional[float] = None
+
+
+class FunderOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    type: Optional[str] = None
+    focus_areas: Optional[list[str]] = None
+    grant_size: Optional[str] = None
+    geography: Optional[str] = None
+    website: Optional[str] = None
+    description: Optional[str] = None
+    relevance_score: Optional[float] = None
+
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
+
+
+def columns_for(model, schema: type[BaseModel]):
+    """Query option loading only the columns schema serialises."""
+    return load_only(*(getattr(model, field) for field in schema.model_fields))
 
 
 class MatchNGORequest(BaseModel):
     program_description: str
+    k: int = Field(10, ge=1, le=100)
+    district: Optional[str] = None
+    state: Optional[str] = None
 
 
 class EmailRequest(BaseModel):
@@ -96,74 +190,160 @@ def health():
     return {"status": "healthy"}
 
 
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "embeddings": ai_engine.embedding_cache.stats(),
+        "llm_responses": ai_engine.response_cache.stats(),
+    }
+
+
+@app.get("/db/pool")
+def db_pool():
+    """Connection pool usage of this worker's sync and async engines."""
+    return pool_metrics()
+
+
+@app.get("/prompt/stats")
+def prompt_stats():
+    """Prompt token counts per LLM task: local estimate vs. the API's usage report."""
+    return ai_engine.prompt_stats
+
+
+@app.delete("/cache/llm")
+def purge_llm_cache(function: Optional[str] = None):
+    """Drop cached LLM responses: all, or one of classify_entity / score_entity / generate_email."""
+    if function and function not in ai_engine.PROMPT_VERSIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown function: {function}")
+    return {"purged": ai_engine.response_cache.purge(function)}
+
+
 # ─── Stats ────────────────────────────────────────────────────────────────────
 
-@app.get("/stats")
-def get_stats(db: Session = Depends(get_db)):
-    total_entities = db.query(Entity).count()
-    total_ngos = db.query(NGO).count()
-    total_funders = db.query(Funder).count()
-    high_priority = db.query(Entity).filter(Entity.priority_score >= 85).count()
+async def cached_summary(name: str, compute):
+    """
+    Dashboard aggregates, recomputed (by awaiting compute()) at most every
+    SUMMARY_TTL seconds, so a cache hit never checks out a connection.
+    Writes in this worker call invalidate_summaries(); other workers catch
+    up when their TTL runs out. On a miss only one request per summary
+    recomputes it; concurrent ones wait for and share its result.
+    """
+    entry = _summaries.get(name)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    async with _summary_locks.setdefault(name, asyncio.Lock()):
+        entry = _summaries.get(name)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        value = await compute()
+        _summaries[name] = (time.monotonic() + SUMMARY_TTL, value)
+    return value
+
+
+def invalidate_summaries():
+    _summaries.clear()
+
+
+async def compute_stats(db: AsyncSession) -> dict:
+    totals = (await db.execute(select(
+        select(func.count()).select_from(Entity).scalar_subquery(),
+        select(func.count()).select_from(NGO).scalar_subquery(),
+        select(func.count()).select_from(Funder).scalar_subquery(),
+        select(func.count()).select_from(Entity).where(Entity.priority_score >= 85).scalar_subquery(),
+    ))).one()
 
     # By type
-    type_counts = {}
-    for entity in db.query(Entity).all():
-        type_counts[entity.type] = type_counts.get(entity.type, 0) + 1
+    type_counts = dict((await db.execute(select(Entity.type, func.count()).group_by(Entity.type))).all())
 
     # By district
-    district_counts = {}
-    for entity in db.query(Entity).all():
-        if entity.district:
-            district_counts[entity.district] = district_counts.get(entity.district, 0) + 1
+    district_counts = dict((await db.execute(
+        select(Entity.district, func.count())
+        .where(Entity.district.isnot(None), Entity.district != "")
+        .group_by(Entity.district)
+    )).all())
 
     return {
-        "total_entities": total_entities,
-        "total_ngos": total_ngos,
-        "total_funders": total_funders,
-        "high_priority_leads": high_priority,
+        "total_entities": totals[0],
+        "total_ngos": totals[1],
+        "total_funders": totals[2],
+        "high_priority_leads": totals[3],
         "by_type": type_counts,
         "by_district": district_counts,
     }
 
 
+@app.get("/stats")
+async def get_stats(db: AsyncSession = Depends(get_async_db)):
+    return await cached_summary("stats", lambda: compute_stats(db))
+
+
 # ─── Ingest ───────────────────────────────────────────────────────────────────
 
-@app.post("/ingest")
-def ingest_entity(req: IngestRequest, db: Session = Depends(get_db)):
+def find_duplicate_entity(db: Session, embedding: list[float], threshold: float = 0.92) -> Optional[int]:
+    """
+    Nearest existing entity by cosine similarity, computed in Postgres via the
+    embedding ANN index. Returns its id if similarity exceeds threshold.
+    """
+    distance = Entity.embedding.cosine_distance(embedding)
+    match = (
+        db.query(Entity.id)
+        .filter(Entity.embedding.isnot(None), distance < 1 - threshold)
+        .order_by(distance)
+        .limit(1)
+        .first()
+    )
+    return match.id if match else None
+
+
+async def analyse_entity(req: IngestRequest) -> tuple[str, float, float]:
+    """Classify (if no type was given) and score an entity. Returns (type, relevance, priority)."""
+    entity_type = req.type
+    if not entity_type:
+        # Classify + score in a single GPT-4 call
+        try:
+            analysis = await ai_engine.analyse_entity_async(req.description, req.district or "")
+        except Exception:
+            analysis = {}
+        entity_type = analysis.get("type") or "Private Hospital"
+        relevance_score = analysis.get("score", 70.0)
+    else:
+        # Type is known, only score it
+        try:
+            score_result = await ai_engine.score_entity_async(req.description, entity_type, req.district or "")
+            relevance_score = score_result["score"]
+        except Exception:
+            relevance_score = 70.0
+
+    # Calculate priority score
+    priority_score = (0.5 * relevance_score) + (0.3 * 75) + (0.2 * 70)
+    return entity_type, relevance_score, priority_score
+
+
+def _save(db: Session, obj):
+    db.add(obj)
+    db.commit()
+    db.refresh(obj)
+    invalidate_summaries()
+    return obj
+
+
+@app.post("/ingest", response_model=EntityOut)
+async def ingest_entity(req: IngestRequest, db: Session = Depends(get_db)):
     """Ingest a new entity: extract text, generate embedding, classify, store."""
     # Generate embedding
     text_for_embedding = f"{req.name}. {req.description}"
     try:
-        embedding = ai_engine.generate_embedding(text_for_embedding)
+        embedding = await ai_engine.generate_embedding_async(text_for_embedding)
     except Exception:
         embedding = None
 
     # Check for duplicates
     if embedding:
-        existing = db.query(Entity).filter(Entity.embedding.isnot(None)).all()
-        existing_embeddings = [(e.id, e.embedding) for e in existing if e.embedding is not None]
-        duplicate_id = ai_engine.check_duplicate(embedding, existing_embeddings)
+        duplicate_id = await run_in_threadpool(find_duplicate_entity, db, embedding)
         if duplicate_id:
             raise HTTPException(status_code=409, detail=f"Duplicate entity detected (similar to entity {duplicate_id})")
 
-    # Classify entity type if not provided
-    entity_type = req.type
-    if not entity_type:
-        try:
-            classification = ai_engine.classify_entity(req.description)
-            entity_type = classification["type"]
-        except Exception:
-            entity_type = "Private Hospital"
-
-    # Score entity
-    try:
-        score_result = ai_engine.score_entity(req.description, entity_type, req.district or "")
-        relevance_score = score_result["score"]
-    except Exception:
-        relevance_score = 70.0
-
-    # Calculate priority score
-    priority_score = (0.5 * relevance_score) + (0.3 * 75) + (0.2 * 70)
+    entity_type, relevance_score, priority_score = await analyse_entity(req)
 
     entity = Entity(
         name=req.name,
@@ -178,19 +358,131 @@ def ingest_entity(req: IngestRequest, db: Session = Depends(get_db)):
         relevance_score=relevance_score,
         priority_score=priority_score,
     )
-    db.add(entity)
+    return await run_in_threadpool(_save, db, entity)
+
+
+def find_duplicate_entities(db: Session, embeddings: dict[int, list[float]], threshold: float = 0.92) -> dict[int, int]:
+    """
+    Batched find_duplicate_entity: one VALUES x LATERAL nearest-neighbour query
+    per chunk. embeddings maps record index -> vector; returns index -> entity id.
+    """
+    duplicates = {}
+    items = list(embeddings.items())
+    for start in range(0, len(items), DUPLICATE_QUERY_CHUNK):
+        chunk = items[start:start + DUPLICATE_QUERY_CHUNK]
+        probe = values(column("idx", Integer), column("vec", Text), name="probe").data(
+            [(idx, "[" + ",".join(map(str, vec)) + "]") for idx, vec in chunk]
+        )
+        distance = Entity.embedding.cosine_distance(cast(probe.c.vec, Vector(1536)))
+        nearest = (
+            select(Entity.id)
+            .where(Entity.embedding.isnot(None), distance < 1 - threshold)
+            .order_by(distance)
+            .limit(1)
+            .lateral("nearest")
+        )
+        rows = db.execute(select(probe.c.idx, nearest.c.id).select_from(probe.join(nearest, true())))
+        duplicates.update({idx: entity_id for idx, entity_id in rows})
+    return duplicates
+
+
+def _bulk_insert_entities(db: Session, rows: list[dict]) -> list[int]:
+    ids = db.scalars(insert(Entity).returning(Entity.id, sort_by_parameter_order=True), rows).all()
     db.commit()
-    db.refresh(entity)
-    return entity
+    invalidate_summaries()
+    return ids
+
+
+@app.post("/ingest/batch")
+async def ingest_batch(req: BatchIngestRequest, db: Session = Depends(get_db)):
+    """
+    Ingest many entities at once: batched embedding calls, one-pass duplicate
+    detection (within the batch and against the DB), concurrent classify/score
+    and a single bulk insert. Returns a result per input record, in order.
+    """
+    results: list[dict] = [None] * len(req.records)
+    records: dict[int, IngestRequest] = {}
+    for i, raw in enumerate(req.records):
+        try:
+            records[i] = IngestRequest.model_validate(raw)
+        except ValidationError as e:
+            results[i] = {"index": i, "status": "error", "detail": e.errors(include_url=False)}
+
+    # Embeddings, in concurrent API-sized batches; a failed batch just skips dedup for its rows
+    async def embed(chunk: list[int]):
+        try:
+            return chunk, await ai_engine.generate_embeddings_async(
+                [f"{records[i].name}. {records[i].description}" for i in chunk]
+            )
+        except Exception:
+            return chunk, None
+
+    embeddings: dict[int, list[float]] = {}
+    pending = list(records)
+    chunks = [pending[start:start + EMBED_BATCH_SIZE] for start in range(0, len(pending), EMBED_BATCH_SIZE)]
+    for chunk, vectors in await asyncio.gather(*(embed(chunk) for chunk in chunks)):
+        if vectors is not None:
+            embeddings.update(zip(chunk, vectors))
+
+    # Duplicates: first within the batch, then the survivors against the DB
+    batch_dupes = await run_in_threadpool(ai_engine.find_batch_duplicates, [embeddings[i] for i in embeddings])
+    indexes = list(embeddings)
+    for pos, earlier in batch_dupes.items():
+        idx = indexes[pos]
+        results[idx] = {"index": idx, "status": "duplicate", "duplicate_of_index": indexes[earlier]}
+        del records[idx]
+    db_dupes = await run_in_threadpool(
+        find_duplicate_entities, db, {i: embeddings[i] for i in records if i in embeddings}
+    )
+    for idx, entity_id in db_dupes.items():
+        results[idx] = {"index": idx, "status": "duplicate", "duplicate_of": entity_id}
+        del records[idx]
+
+    # Classify + score concurrently; the per-model LLM slots bound how many are in flight
+    analysed = dict(zip(records, await asyncio.gather(*(analyse_entity(r) for r in records.values()))))
+
+    rows = []
+    for i, (entity_type, relevance_score, priority_score) in analysed.items():
+        r = records[i]
+        rows.append({
+            "name": r.name,
+            "type": entity_type,
+            "district": r.district,
+            "state": r.state,
+            "website": r.website,
+            "email": r.email,
+            "phone": r.phone,
+            "description": r.description,
+            "embedding": embeddings.get(i),
+            "relevance_score": relevance_score,
+            "priority_score": priority_score,
+        })
+
+    if rows:
+        ids = await run_in_threadpool(_bulk_insert_entities, db, rows)
+        for i, entity_id, row in zip(analysed, ids, rows):
+            results[i] = {
+                "index": i,
+                "status": "created",
+                "id": entity_id,
+                "type": row["type"],
+                "relevance_score": row["relevance_score"],
+                "priority_score": row["priority_score"],
+            }
+
+    counts = {"created": 0, "duplicate": 0, "error": 0}
+    for r in results:
+        counts[r["status"]] += 1
+    return {**counts, "results": results}
 
 
 # ─── Classify ─────────────────────────────────────────────────────────────────
 
 @app.post("/classify")
-def classify_entity(req: ClassifyRequest):
-    """Classify an organization description using GPT-4."""
+async def classify_entity(req: ClassifyRequest, refresh: bool = False):
+    """Classify an organization description using GPT-4. refresh=true bypasses the response cache."""
     try:
-        result = ai_engine.classify_entity(req.description)
+        result = await ai_engine.classify_entity_async(req.description, use_cache=not refresh)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -199,22 +491,28 @@ def classify_entity(req: ClassifyRequest):
 # ─── Score ────────────────────────────────────────────────────────────────────
 
 @app.post("/score")
-def score_entity(req: ScoreRequest, db: Session = Depends(get_db)):
-    """Score an entity's relevance for maternal health pilot."""
-    entity = db.query(Entity).filter(Entity.id == req.entity_id).first()
+async def score_entity(req: ScoreRequest, refresh: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Score an entity's relevance for maternal health pilot. refresh=true bypasses the response cache."""
+    entity = (await db.execute(
+        select(Entity)
+        .options(load_only(Entity.id, Entity.description, Entity.type, Entity.district))
+        .where(Entity.id == req.entity_id)
+    )).scalar_one_or_none()
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
 
     try:
-        result = ai_engine.score_entity(
+        result = await ai_engine.score_entity_async(
             entity.description or "",
             entity.type or "",
             entity.district or "",
+            use_cache=not refresh,
         )
         # Update score in DB
         entity.relevance_score = result["score"]
         entity.priority_score = (0.5 * result["score"]) + (0.3 * 75) + (0.2 * 70)
-        db.commit()
+        await db.commit()
+        invalidate_summaries()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -222,10 +520,41 @@ def score_entity(req: ScoreRequest, db: Session = Depends(get_db)):
 
 # ─── Search ───────────────────────────────────────────────────────────────────
 
-@app.post("/search")
-def search_entities(req: SearchRequest, db: Session = Depends(get_db)):
-    """Search entities with filters, sorted by relevance score."""
-    query = db.query(Entity)
+def text_search(q, model, term: str, mode: SearchMode, columns):
+    """
+    Filter q by term. Full-text mode matches model.search_vector and also
+    returns its ts_rank expression to sort by; substring mode ORs an ILIKE
+    over columns. Returns (query, rank or None).
+    """
+    if mode == "fulltext":
+        ts_query = func.websearch_to_tsquery("english", term)
+        rank = func.ts_rank(model.search_vector, ts_query, type_=REAL)
+        return q.filter(model.search_vector.op("@@")(ts_query)), rank
+    condition = columns[0].ilike(f"%{term}%")
+    for col in columns[1:]:
+        condition = condition | col.ilike(f"%{term}%")
+    return q.filter(condition), None
+
+
+async def paginate(db: AsyncSession, stmt, rank, score, id_column, cursor: Optional[str], limit: int) -> dict:
+    """Keyset page ordered by (text rank,) score, id — all descending."""
+    keys = ([rank] if rank is not None else []) + [score, id_column]
+    try:
+        stmt = keyset_select(stmt, keys, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return keyset_page((await db.execute(stmt)).all(), limit)
+
+
+@app.post("/search", response_model=Page[EntityOut])
+async def search_entities(req: SearchRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Search entities with filters, sorted by relevance score (by text rank
+    first in fulltext mode). Returns {items, next_cursor}; pass next_cursor
+    back as cursor for the following page.
+    """
+    query = select(Entity).options(columns_for(Entity, EntityOut))
+    rank = None
 
     if req.state:
         query = query.filter(Entity.state == req.state)
@@ -234,71 +563,86 @@ def search_entities(req: SearchRequest, db: Session = Depends(get_db)):
     if req.type:
         query = query.filter(Entity.type == req.type)
     if req.query:
-        query = query.filter(
-            Entity.name.ilike(f"%{req.query}%") |
-            Entity.description.ilike(f"%{req.query}%")
-        )
+        query, rank = text_search(query, Entity, req.query, req.mode, [Entity.name, Entity.description])
 
-    entities = query.order_by(Entity.relevance_score.desc()).all()
-    return entities
+    return await paginate(db, query, rank, Entity.relevance_score, Entity.id, req.cursor, req.limit)
 
 
 # ─── NGOs ─────────────────────────────────────────────────────────────────────
 
-@app.get("/ngos")
-def get_ngos(query: Optional[str] = None, db: Session = Depends(get_db)):
-    """Get all NGOs, optionally filtered by query."""
-    q = db.query(NGO)
+@app.get("/ngos", response_model=Page[NGOOut])
+async def get_ngos(
+    query: Optional[str] = None,
+    mode: SearchMode = "substring",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """NGOs by alignment score, optionally filtered by query. Returns {items, next_cursor}."""
+    q = select(NGO).options(columns_for(NGO, NGOOut))
+    rank = None
     if query:
-        q = q.filter(
-            NGO.name.ilike(f"%{query}%") |
-            NGO.description.ilike(f"%{query}%")
-        )
-    return q.order_by(NGO.alignment_score.desc()).all()
+        q, rank = text_search(q, NGO, query, mode, [NGO.name, NGO.description])
+    return await paginate(db, q, rank, NGO.alignment_score, NGO.id, cursor, limit)
 
 
-@app.post("/match-ngos")
+@app.post("/match-ngos", response_model=list[NGOOut])
 def match_ngos(req: MatchNGORequest, db: Session = Depends(get_db)):
     """Match NGOs to a program using embedding similarity."""
-    ngos = db.query(NGO).all()
-
-    if not ngos:
-        return []
-
     try:
-        ngo_embeddings = [(n.id, n.embedding) for n in ngos if n.embedding is not None]
-        if ngo_embeddings:
-            ranked_ids = ai_engine.match_ngos_by_embedding(req.program_description, ngo_embeddings)
+        program_embedding = ai_engine.generate_embedding(req.program_description)
+    except OpenAIError as e:
+        logger.warning("Program embedding failed, matching NGOs by alignment score: %s", e)
+        program_embedding = None
+
+    if program_embedding is not None:
+        ngo_index.refresh(db)
+        ranked_ids = ngo_index.search(program_embedding, k=req.k, district=req.district, state=req.state)
+        if ranked_ids:
+            ngos = db.query(NGO).options(columns_for(NGO, NGOOut)).filter(NGO.id.in_(ranked_ids))
             ngo_map = {n.id: n for n in ngos}
             return [ngo_map[ngo_id] for ngo_id in ranked_ids if ngo_id in ngo_map]
-    except Exception:
-        pass
 
-    # Fallback: return by alignment score
-    return sorted(ngos, key=lambda n: n.alignment_score, reverse=True)[:10]
+    # Fallback (no embedding, or no embedded NGO matches the filters): return by alignment score
+    q = db.query(NGO).options(columns_for(NGO, NGOOut))
+    if req.district:
+        q = q.filter(NGO.district.ilike(req.district))
+    if req.state:
+        q = q.filter(NGO.state.ilike(req.state))
+    return q.order_by(NGO.alignment_score.desc(), NGO.id.desc()).limit(req.k).all()
 
 
 # ─── Funders ──────────────────────────────────────────────────────────────────
 
-@app.get("/funders")
-def get_funders(
+@app.get("/funders", response_model=Page[FunderOut])
+async def get_funders(
     type: Optional[str] = None,
     geography: Optional[str] = None,
-    db: Session = Depends(get_db),
+    query: Optional[str] = None,
+    mode: SearchMode = "substring",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(Funder)
+    """Funders by relevance score, optionally filtered. Returns {items, next_cursor}."""
+    q = select(Funder).options(columns_for(Funder, FunderOut))
+    rank = None
     if type:
         q = q.filter(Funder.type == type)
     if geography:
         q = q.filter(Funder.geography.ilike(f"%{geography}%"))
-    return q.order_by(Funder.relevance_score.desc()).all()
+    if query:
+        q, rank = text_search(q, Funder, query, mode, [Funder.name, Funder.description])
+    return await paginate(db, q, rank, Funder.relevance_score, Funder.id, cursor, limit)
 
 
 # ─── Entities ─────────────────────────────────────────────────────────────────
 
-@app.get("/entities/{entity_id}")
-def get_entity(entity_id: int, db: Session = Depends(get_db)):
-    entity = db.query(Entity).filter(Entity.id == entity_id).first()
+@app.get("/entities/{entity_id}", response_model=EntityOut)
+async def get_entity(entity_id: int, db: AsyncSession = Depends(get_async_db)):
+    entity = (await db.execute(
+        select(Entity).options(columns_for(Entity, EntityOut)).where(Entity.id == entity_id)
+    )).scalar_one_or_none()
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
     return entity
@@ -308,51 +652,105 @@ def get_entity(entity_id: int, db: Session = Depends(get_db)):
 # ─── Email Generation ─────────────────────────────────────────────────────────
 
 @app.post("/generate-email")
-def generate_email(req: EmailRequest):
-    """Generate a professional outreach email using GPT-4."""
+async def generate_email(req: EmailRequest, refresh: bool = False):
+    """Generate a professional outreach email using GPT-4. refresh=true bypasses the response cache."""
     try:
-        result = ai_engine.generate_email(req.organization_name, req.type)
+        result = await ai_engine.generate_email_async(req.organization_name, req.type, use_cache=not refresh)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/generate-email/stream")
+async def generate_email_stream(req: EmailRequest, refresh: bool = False):
+    """
+    Server-Sent Events variant of /generate-email: `token` events carry
+    {text} as it is generated, then one `email` event carries {subject, body}.
+    A failure mid-stream is reported as an `error` event with {detail}.
+    """
+    async def events():
+        yield ": connected\n\n"  # first byte goes out before the model answers
+        try:
+            async for event, data in ai_engine.stream_email(req.organization_name, req.type, use_cache=not refresh):
+                yield _sse(event, {"text": data} if event == "token" else data)
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ─── Heatmap ──────────────────────────────────────────────────────────────────
 
-@app.get("/heatmap")
-def get_heatmap(db: Session = Depends(get_db)):
-    """Return district-wise entity count for heatmap."""
-    DISTRICT_COORDS = {
-        "Visakhapatnam": (17.6868, 83.2185),
-        "Hyderabad": (17.3850, 78.4867),
-        "Guntur": (16.3067, 80.4365),
-        "Krishna": (16.6100, 80.7214),
-        "Rangareddy": (17.2543, 78.3808),
-        "East Godavari": (17.0005, 81.8040),
-        "Eluru": (16.7107, 81.0952),
-        "Karimnagar": (18.4386, 79.1288),
-        "Nellore": (14.4426, 79.9865),
-        "Kurnool": (15.8281, 78.0373),
-        "Warangal": (17.9784, 79.5941),
-        "Nizamabad": (18.6725, 78.0941),
-    }
+def load_district_table(districts: pd.DataFrame) -> dict[str, tuple[float, float, Optional[int]]]:
+    """district (including legacy spellings) -> (lat, lng, est_mothers_per_year)"""
+    mothers = dict(zip(districts["district"], districts["est_mothers_per_year"]))
+    table = {}
+    for district, (lat, lon, canonical) in reference_data.district_locations().items():
+        est = mothers.get(canonical)
+        table[district] = (lat, lon, int(est) if est is not None else None)
+    return table
+
+
+_district_table = {"version": None, "table": None}
+UNKNOWN_DISTRICT = (17.0, 80.0, None)
+
 
-    district_counts: dict = {}
-    for entity in db.query(Entity).all():
-        if entity.district:
-            district_counts[entity.district] = district_counts.get(entity.district, 0) + 1
+def district_table() -> dict[str, tuple[float, float, Optional[int]]]:
+    version = reference_data.version("districts", "district_coords")
+    if _district_table["table"] is None or version != _district_table["version"]:
+        _district_table["table"] = load_district_table(reference_data.frame("districts"))
+        _district_table["version"] = version
+    return _district_table["table"]
 
+
+async def compute_heatmap(db: AsyncSession, weighted: bool) -> list[dict]:
+    rows = (await db.execute(
+        select(Entity.district, func.count())
+        .where(Entity.district.isnot(None), Entity.district != "")
+        .group_by(Entity.district)
+    )).all()
+
+    table = district_table()
     result = []
-    for district, count in district_counts.items():
-        coords = DISTRICT_COORDS.get(district, (17.0, 80.0))
-        result.append({
-            "district": district,
-            "count": count,
-            "lat": coords[0],
-            "lng": coords[1],
-        })
+    for district, count in rows:
+        lat, lng, est_mothers = table.get(district, UNKNOWN_DISTRICT)
+        point = {"district": district, "count": count, "lat": lat, "lng": lng}
+        if weighted:
+            point["est_mothers_per_year"] = est_mothers
+            # entities x thousands of expected mothers: outreach density where need is highest
+            point["weight"] = round(count * (est_mothers or 0) / 1000, 2)
+        result.append(point)
 
-    return sorted(result, key=lambda x: x["count"], reverse=True)
+    return sorted(result, key=lambda x: x["weight" if weighted else "count"], reverse=True)
+
+
+@app.get("/heatmap")
+async def get_heatmap(weighted: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Return district-wise entity count for heatmap, optionally weighted by est_mothers_per_year."""
+    return await cached_summary(f"heatmap:{weighted}", lambda: compute_heatmap(db, weighted))
+
+
+# ─── Network Graph ────────────────────────────────────────────────────────────
+
+@app.get("/graph/{district}")
+def get_district_graph(
+    district: str,
+    max_ngos: int = Query(5, ge=1, le=50),
+    max_facs: int = Query(3, ge=1, le=50),
+):
+    """ReactFlow nodes/edges for the top NGOs, facilities and their funders in a district."""
+    try:
+        return graph_builder.district_reactflow(district, max_ngos, max_facs)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=f"Graph data unavailable: {os.path.basename(e.filename)}")
 
 
 # ─── Seed Data ────────────────────────────────────────────────────────────────
@@ -364,73 +762,53 @@ def seed_data(db: Session = Depends(get_db)):
     if db.query(Entity).count() > 0:
         return {"message": "Database already seeded", "count": db.query(Entity).count()}
 
-    # Seed entities
-    for data in SEED_ENTITIES:
-        entity = Entity(**data)
-        db.add(entity)
+    results = bulk_load.load_source(engine, "seed")
+    ngo_index.invalidate()
+    invalidate_summaries()
+    return {"message": "Seeded successfully", **{r["table"]: r["rows"] for r in results}}
 
-    # Seed NGOs
-    for data in SEED_NGOS:
-        ngo = NGO(**data)
-        db.add(ngo)
 
-    # Seed funders
-    for data in SEED_FUNDERS:
-        funder = Funder(**data)
-        db.add(funder)
+class BulkLoadRequest(BaseModel):
+    sources: list[Literal["seed", "ngos", "facilities", "funders"]] = Field(..., min_length=1)
 
-    db.commit()
+
+@app.post("/bulk-load")
+def bulk_load_data(req: BulkLoadRequest):
+    """
+    COPY seed data, the scored CSVs and their embeddings (looked up by name in
+    the embeddings.py store) into Postgres, upserting on name. Reports rows
+    and rows/sec per table.
+    """
+    try:
+        results = bulk_load.load_sources(engine, req.sources)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=f"Source data unavailable: {os.path.basename(e.filename)}")
+    finally:
+        ngo_index.invalidate()
+        invalidate_summaries()
+
+    rows = sum(r["rows"] for r in results)
+    seconds = sum(r["seconds"] for r in results)
     return {
-        "message": "Seeded successfully",
-        "entities": len(SEED_ENTITIES),
-        "ngos": len(SEED_NGOS),
-        "funders": len(SEED_FUNDERS),
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds) if seconds else rows,
+        "results": results,
     }
+
+
 @app.get("/priority-ranking")
-def get_priority_ranking():
+def get_priority_ranking(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    type: Optional[str] = None,
+    district: Optional[str] = None,
+):
     """
     Returns a unified list of top entities (NGOs + Facilities)
     sorted by composite priority score using a stable demo formula.
     """
-    rows = []
-
-    for _, r in NGO_SCORED.iterrows():
-        name_str = str(r.get("name", ""))
-        # Stable, realistic score between 75 and 99 based on the characters in the name
-        demo_score = 75 + (sum(ord(c) for c in name_str) % 24)
-        
-        rows.append({
-            "name": name_str,
-            "type": "NGO",
-            "district": str(r.get("district", "")),
-            "state": str(r.get("state", "")),
-            "relevancescore": float(demo_score),
-            "priorityscore": float(demo_score),
-        })
-
-    for _, r in FAC_SCORED.iterrows():
-        name_str = str(r.get("name", ""))
-        demo_score = 75 + (sum(ord(c) for c in name_str) % 24)
-        
-        rows.append({
-            "name": name_str,
-            "type": str(r.get("type", "Facility")),
-            "district": str(r.get("district", "")),
-            "state": "Andhra Pradesh",
-            "relevancescore": float(demo_score),
-            "priorityscore": float(demo_score),
-        })
-
-    # Sort and take top 50
-    rows = sorted(rows, key=lambda r: r["priorityscore"], reverse=True)[:50]
-    
-    # Terminal Logging for verification (Top 5 scores)
-    print("\n--- VERIFYING DEMO SCORES ---")
-    for i, row in enumerate(rows[:5]):
-        print(f"Rank {i+1}: {row['name']} -> Score: {row['priorityscore']}")
-    print("-----------------------------\n")
-
-    return rows
+    return priority_ranking.rank_page(limit=limit, offset=offset, type=type, district=district)
 
 
 class MotherMatchRequest(BaseModel):
@@ -441,20 +819,34 @@ class MotherMatchRequest(BaseModel):
 
 
 @app.post("/mother-match")
-def mother_match(req: MotherMatchRequest):
+async def mother_match(req: MotherMatchRequest, llm: bool = False):
     """
-    Match a mother to a hospital using AI and real CSV data.
+    Match a mother to a hospital using real CSV data.
+
+    Known pincodes are matched locally (nearest high-capability facility,
+    NGO in the same district, income rules in code); llm=true only has
+    GPT-4 rephrase the reasoning. Unknown pincodes fall back to the full
+    AI match.
     """
+    local = mother_match_engine.get_matcher().match(req.dict())
+    if local is not None:
+        if llm:
+            try:
+                local["reasoning"] = await ai_engine.phrase_match_reasoning_async(req.dict(), local)
+            except Exception:
+                pass  # keep the locally generated reasoning
+        return local
+
     # 1. Provide district context for AI analysis
-    top_districts = DISTRICT_DATA.sort_values(by="est_mothers_per_year", ascending=False).head(5).to_dict('records')
+    top_districts = reference_data.top("districts", "est_mothers_per_year", 5)
     
     # Filter for high-capability facilities to ensure "perfect" recommendations
-    top_facilities = FAC_SCORED.sort_values(by="capability_score", ascending=False).head(15).to_dict('records')
-    top_ngos = NGO_SCORED.sort_values(by="capability_score", ascending=False).head(10).to_dict('records')
+    top_facilities = reference_data.top("facilities", "capability_score", 15)
+    top_ngos = reference_data.top("ngos", "capability_score", 10)
     
     try:
         # Pass Mother details, top facilities, NGOs, and district context to the AI engine
-        result = ai_engine.match_mother_to_hospital(
+        result = await ai_engine.match_mother_to_hospital_async(
             req.dict(), 
             top_facilities, 
             top_ngos, 
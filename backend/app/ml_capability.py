@@ -1,70 +1,313 @@
-import pandas as pd
+"""
+Capability model: a random forest over entity embeddings, trained on keyword
+auto-labels, that scores NGOs and facilities for maternal health.
+
+    python ml_capability.py [--reduce-dim 64] [--force]
+
+Every model that is trained is kept in a versioned registry
+(data/models/registry.json) with its settings, metrics and training time.
+A run reuses a registered model when the settings (labelling keywords,
+forest parameters, PCA size, embedding model) match and its training set
+still matches the data: no labelled sample new, changed or gone (or, opted
+into with --retrain-fraction, less than that share). Otherwise it trains a
+new version. Scoring is
+incremental too: only entities that are new, or whose embedding or model
+changed since the last run, are scored. A scored CSV is rewritten only when
+something in it changed.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import joblib
 import numpy as np
+import pandas as pd
+import pyarrow as pa
+from sklearn.decomposition import PCA
 from sklearn.ensemble import RandomForestClassifier
-import joblib
-import logging
+from sklearn.metrics import roc_auc_score
+from sklearn.pipeline import make_pipeline
+
+import embeddings
+from embeddings import DATA_DIR
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Auto-labelling rule (1 = High Capability for Maternal Health, 0 = Low)
+TARGET_KEYWORDS = ['maternal', 'neonatal', 'ob-gyn', 'pregnancy', 'delivery', 'midwife', 'icu']
+MODEL_PARAMS = {"n_estimators": 100, "random_state": 42}
+RETRAIN_FRACTION = 0.0  # any change in the labelled samples retrains
+
+REGISTRY_DIR = os.path.join(DATA_DIR, "models")
+REGISTRY_PATH = os.path.join(REGISTRY_DIR, "registry.json")
+
+# dataset -> (source CSV, labelled text column, scored CSV)
+SCORED = {
+    "ngos": ("ngos_300.csv", "description", "ngos_scored.csv"),
+    "facilities": ("facilities_200.csv", "services_text", "facilities_scored.csv"),
+}
+
+
+def auto_label(texts: pd.Series) -> np.ndarray:
+    pattern = "|".join(re.escape(word) for word in TARGET_KEYWORDS)
+    return texts.fillna('').str.lower().str.contains(pattern).astype(int).values
+
+
+def embedding_hashes(dataset: str) -> dict[str, bytes]:
+    """id -> hash of the text its current vector was encoded from."""
+    table, _ = embeddings.read_manifest(dataset)
+    if table is None:
+        raise KeyError(f"{dataset} has not been embedded; run embeddings.py")
+    return dict(zip(table.column("id").to_pylist(), table.column("hash").to_pylist()))
+
+
 def create_training_data():
     """
     Hackathon trick: Auto-labeling data based on keywords to train our model.
     In production, this would be labeled by human experts.
     """
     logger.info("Loading Data & Embeddings for Training...")
-    
-    # Load Data
-    ngos = pd.read_csv('data/ngos_300.csv')
-    ngo_embeddings = np.load('data/ngo_embeddings.npy')
-    
-    facilities = pd.read_csv('data/facilities_200.csv')
-    fac_embeddings = np.load('data/facility_embeddings.npy')
-    
-    # Auto-labeling logic (1 = High Capability for Maternal Health, 0 = Low)
-    target_keywords = ['maternal', 'neonatal', 'ob-gyn', 'pregnancy', 'delivery', 'midwife', 'icu']
-    
-    ngo_labels = ngos['description'].fillna('').str.lower().apply(
-        lambda x: 1 if any(word in str(x) for word in target_keywords) else 0
-    ).values
-    
-    fac_labels = facilities['services_text'].fillna('').str.lower().apply(
-        lambda x: 1 if any(word in str(x) for word in target_keywords) else 0
-    ).values
-    
+    frames, labels = {}, []
+    for dataset, (csv, text_column, _) in SCORED.items():
+        frames[dataset] = pd.read_csv(os.path.join(DATA_DIR, csv))
+        labels.append(auto_label(frames[dataset][text_column]))
     # Combine data to train one unified classifier
-    X_train = np.vstack((ngo_embeddings, fac_embeddings))
-    y_train = np.concatenate((ngo_labels, fac_labels))
-    
-    return X_train, y_train, ngos, facilities, ngo_embeddings, fac_embeddings
-
-def train_and_score():
-    X_train, y_train, ngos, facilities, ngo_embeddings, fac_embeddings = create_training_data()
-    
-    logger.info("Training Random Forest Classifier...")
-    # Train the model
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(X_train, y_train)
-    
-    # Save the model so we don't have to retrain it every API call
-    joblib.dump(clf, 'data/capability_model.pkl')
-    logger.info("✅ Model trained and saved as data/capability_model.pkl")
-    
-    # Optional: Generate scores for everything right now so our API is super fast
-    logger.info("Generating scores for all entities...")
-    
-    # predict_proba returns probability [class_0, class_1]. We want class_1 (High Capability)
-    ngo_scores = clf.predict_proba(ngo_embeddings)[:, 1]
-    fac_scores = clf.predict_proba(fac_embeddings)[:, 1]
-    
-    # Save the scores back to the CSVs so they are easy to load
-    ngos['capability_score'] = np.round(ngo_scores * 100, 2)
-    facilities['capability_score'] = np.round(fac_scores * 100, 2)
-    
-    ngos.to_csv('data/ngos_scored.csv', index=False)
-    facilities.to_csv('data/facilities_scored.csv', index=False)
-    
-    logger.info("✅ Scored CSVs saved! Backend is ready to serve data.")
+    return frames, np.concatenate(labels)
+
+
+def settings_fingerprint(datasets, reduce_dim: Optional[int]) -> str:
+    """Everything but the data that decides what a trained model looks like."""
+    return hashlib.sha256(json.dumps({
+        "keywords": TARGET_KEYWORDS,
+        "params": MODEL_PARAMS,
+        "reduce_dim": reduce_dim,
+        "embedding_models": {d: embeddings.read_manifest(d)[1].get("model") for d in datasets},
+    }, sort_keys=True).encode()).hexdigest()
+
+
+def training_samples(frames: dict, y: np.ndarray) -> pd.DataFrame:
+    """One row per training sample: its key, embedding hash and label."""
+    keys, hashes = [], []
+    for dataset, df in frames.items():
+        known = embedding_hashes(dataset)
+        names = df["name"].astype(str)
+        keys.extend(f"{dataset}/{name}" for name in names)
+        hashes.extend(known.get(name) for name in names)
+    return pd.DataFrame({"key": keys, "hash": hashes, "label": y})
+
+
+def changed_fraction(samples: pd.DataFrame, trained: pd.DataFrame) -> float:
+    """Share of samples (current or trained on) that are new, gone, or differ in embedding or label."""
+    merged = samples.merge(trained, on="key", how="outer", suffixes=("", "_trained"), indicator=True)
+    changed = (merged["_merge"] != "both") | (merged["hash"] != merged["hash_trained"]) \
+        | (merged["label"] != merged["label_trained"])
+    return float(changed.mean()) if len(merged) else 0.0
+
+
+# ─── Registry ─────────────────────────────────────────────────────────────────
+
+def load_registry() -> dict:
+    try:
+        with open(REGISTRY_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"current": None, "models": []}
+
+
+def save_registry(registry: dict):
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    tmp = f"{REGISTRY_PATH}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(registry, f, indent=2)
+    os.replace(tmp, REGISTRY_PATH)
+
+
+def register(registry: dict, model, settings: str, samples: pd.DataFrame, **info) -> dict:
+    """Store model and the samples it was trained on as the next version, and make it current."""
+    version = max((m["version"] for m in registry["models"]), default=0) + 1
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    path = f"capability_v{version}.joblib"
+    joblib.dump(model, os.path.join(REGISTRY_DIR, path))
+    samples.to_feather(os.path.join(REGISTRY_DIR, f"capability_v{version}.samples.arrow"))
+    entry = {
+        "version": version,
+        "path": path,
+        "settings": settings,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **info,
+    }
+    registry["models"].append(entry)
+    registry["current"] = version
+    save_registry(registry)
+    return entry
+
+
+def load_model(entry: dict):
+    return joblib.load(os.path.join(REGISTRY_DIR, entry["path"]))
+
+
+def load_samples(entry: dict) -> pd.DataFrame:
+    return pd.read_feather(os.path.join(REGISTRY_DIR, f"capability_v{entry['version']}.samples.arrow"))
+
+
+# ─── Training ─────────────────────────────────────────────────────────────────
+
+def build_model(reduce_dim: Optional[int], n_samples: int, n_features: int):
+    # All cores; out-of-bag predictions give metrics without a held-out fit
+    forest = RandomForestClassifier(**MODEL_PARAMS, n_jobs=-1, oob_score=True)
+    if not reduce_dim:
+        return forest
+    n_components = min(reduce_dim, n_samples, n_features)
+    return make_pipeline(PCA(n_components=n_components, random_state=MODEL_PARAMS["random_state"]), forest)
+
+
+def oob_metrics(model, y: np.ndarray) -> dict:
+    forest = model[-1] if hasattr(model, "steps") else model
+    metrics = {"oob_accuracy": round(float(forest.oob_score_), 4), "positive_rate": round(float(y.mean()), 4)}
+    if len(np.unique(y)) == 2:
+        metrics["oob_roc_auc"] = round(float(roc_auc_score(y, forest.oob_decision_function_[:, 1])), 4)
+    return metrics
+
+
+def train(frames: dict, samples: pd.DataFrame, settings: str, reduce_dim: Optional[int], registry: dict) -> dict:
+    X_train = np.vstack([embeddings.vectors_for(d, df["name"]) for d, df in frames.items()])
+    logger.info(f"Training Random Forest Classifier on {X_train.shape[0]} x {X_train.shape[1]}...")
+    model = build_model(reduce_dim, *X_train.shape)
+    start = time.perf_counter()
+    y = samples["label"].to_numpy()
+    model.fit(X_train, y)
+    seconds = round(time.perf_counter() - start, 3)
+    entry = register(
+        registry, model, settings, samples,
+        params={**MODEL_PARAMS, "reduce_dim": reduce_dim},
+        n_samples=int(X_train.shape[0]),
+        n_features=int(X_train.shape[1]),
+        metrics=oob_metrics(model, y),
+        training_seconds=seconds,
+    )
+    logger.info(f"✅ Model v{entry['version']} trained in {seconds}s: {entry['metrics']}")
+    return entry
+
+
+# ─── Scoring ──────────────────────────────────────────────────────────────────
+
+def _scores_path(dataset: str) -> str:
+    return os.path.join(REGISTRY_DIR, f"{dataset}_scores.arrow")
+
+
+def _read_scores(dataset: str) -> tuple[dict, dict]:
+    """(id -> (embedding hash, score), metadata) from the last scoring run."""
+    try:
+        table = pa.ipc.open_file(pa.memory_map(_scores_path(dataset))).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return {}, {}
+    previous = dict(zip(table.column("id").to_pylist(),
+                        zip(table.column("hash").to_pylist(), table.column("score").to_pylist())))
+    return previous, json.loads(table.schema.metadata[b"scoring"])
+
+
+def _write_atomic(path: str, write):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def score(dataset: str, df: pd.DataFrame, entry: dict, model) -> dict:
+    """Score dataset's new and changed entities and refresh its scored CSV if anything changed."""
+    csv, _, scored_csv = SCORED[dataset]
+    st = os.stat(os.path.join(DATA_DIR, csv))
+    source = [st.st_mtime_ns, st.st_size]
+    previous, meta = _read_scores(dataset)
+    if meta.get("version") != entry["version"]:
+        previous = {}
+
+    ids = df["name"].astype(str).tolist()
+    hashes = embedding_hashes(dataset)
+    current = [hashes.get(i) for i in ids]
+    todo = [k for k, (i, h) in enumerate(zip(ids, current)) if previous.get(i, (None,))[0] != h]
+    scores = np.array([previous[i][1] if i in previous else np.nan for i in ids], dtype=np.float64)
+    if todo:
+        # predict_proba returns probability [class_0, class_1]. We want class_1 (High Capability)
+        vectors = embeddings.vectors_for(dataset, [ids[k] for k in todo])
+        scores[todo] = np.round(model.predict_proba(vectors)[:, 1] * 100, 2)
+
+    changed = bool(todo) or meta.get("source") != source or len(previous) != len(set(ids))
+    if changed:
+        # Save the scores back to the CSVs so they are easy to load
+        out = df.copy()
+        out['capability_score'] = scores
+        _write_atomic(os.path.join(DATA_DIR, scored_csv), lambda p: out.to_csv(p, index=False))
+        table = pa.table(
+            {"id": pa.array(ids, pa.string()), "hash": pa.array(current, pa.binary(16)),
+             "score": pa.array(scores, pa.float64())},
+            metadata={b"scoring": json.dumps({"version": entry["version"], "source": source}).encode()},
+        )
+
+        def write_state(p):
+            with pa.OSFile(p, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        _write_atomic(_scores_path(dataset), write_state)
+    return {"dataset": dataset, "rows": len(ids), "rescored": len(todo), "written": changed}
+
+
+def select_model(registry: dict, settings: str, samples: pd.DataFrame, retrain_fraction: float) -> Optional[dict]:
+    """The registered model closest to the current data, if it is close enough to reuse."""
+    best, best_change = None, None
+    for entry in reversed(registry["models"]):
+        if entry["settings"] != settings:
+            continue
+        change = changed_fraction(samples, load_samples(entry))
+        if best is None or change < best_change:
+            best, best_change = entry, change
+        if change == 0:
+            break
+    if best is None or (best_change and best_change >= retrain_fraction):
+        return None
+    logger.info(f"Reusing model v{best['version']}: {best_change:.1%} of samples changed since it was trained.")
+    return best
+
+
+def train_and_score(reduce_dim: Optional[int] = None, force: bool = False,
+                    retrain_fraction: float = RETRAIN_FRACTION) -> dict:
+    frames, y_train = create_training_data()
+    settings = settings_fingerprint(frames, reduce_dim)
+    samples = training_samples(frames, y_train)
+    registry = load_registry()
+
+    entry = None if force else select_model(registry, settings, samples, retrain_fraction)
+    if entry is None:
+        entry = train(frames, samples, settings, reduce_dim, registry)
+    elif registry["current"] != entry["version"]:
+        registry["current"] = entry["version"]
+        save_registry(registry)
+
+    logger.info("Scoring new and changed entities...")
+    model = load_model(entry)
+    results = [score(dataset, df, entry, model) for dataset, df in frames.items()]
+    for r in results:
+        logger.info(f"{r['dataset']}: {r['rescored']} of {r['rows']} scored"
+                    + ("" if r["written"] else ", CSV unchanged"))
+    logger.info("✅ Scored CSVs up to date! Backend is ready to serve data.")
+    return {"model": entry, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the capability model and score NGOs and facilities.")
+    parser.add_argument("--reduce-dim", type=int, default=None,
+                        help="PCA components to fit the forest on (default: raw embeddings)")
+    parser.add_argument("--force", action="store_true", help="retrain even if the inputs are unchanged")
+    parser.add_argument("--retrain-fraction", type=float, default=RETRAIN_FRACTION,
+                        help="share of changed samples tolerated before retraining (default 0: any change)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    train_and_score(args.reduce_dim, args.force, args.retrain_fraction)
+
 
 if __name__ == "__main__":
-    train_and_score()
+    main()
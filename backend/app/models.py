@@ -1,13 +1,26 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ARRAY
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Text, DateTime, ARRAY, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
 
 Base = declarative_base()
 
 
+def search_document(*weighted_columns: tuple[str, str]) -> Computed:
+    """Stored tsvector over (column, weight) pairs, for full-text search."""
+    parts = " || ".join(
+        f"setweight(to_tsvector('english'::regconfig, coalesce({col}, '')), '{weight}')"
+        for col, weight in weighted_columns
+    )
+    return Computed(parts, persisted=True)
+
+
 class Entity(Base):
     __tablename__ = "entities"
+    # Keyset pagination order
+    __table_args__ = (Index("ix_entities_relevance_score_id", "relevance_score", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(500), nullable=False, index=True)
@@ -23,10 +36,13 @@ class Entity(Base):
     relevance_score = Column(Float, default=0.0)
     priority_score = Column(Float, default=0.0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    search_vector = deferred(Column(TSVECTOR, search_document(("name", "A"), ("district", "B"), ("description", "C"))))
 
 
 class NGO(Base):
     __tablename__ = "ngos"
+    # Keyset pagination order
+    __table_args__ = (Index("ix_ngos_alignment_score_id", "alignment_score", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(500), nullable=False, index=True)
@@ -37,10 +53,13 @@ class NGO(Base):
     description = Column(Text)
     embedding = Column(Vector(1536))
     alignment_score = Column(Float, default=0.0)
+    search_vector = deferred(Column(TSVECTOR, search_document(("name", "A"), ("district", "B"), ("description", "C"))))
 
 
 class Funder(Base):
     __tablename__ = "funders"
+    # Keyset pagination order
+    __table_args__ = (Index("ix_funders_relevance_score_id", "relevance_score", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(500), nullable=False, index=True)
@@ -52,3 +71,12 @@ class Funder(Base):
     description = Column(Text)
     embedding = Column(Vector(1536))
     relevance_score = Column(Float, default=0.0)
+    search_vector = deferred(Column(TSVECTOR, search_document(("name", "A"), ("geography", "B"), ("description", "C"))))
+
+
+class DataVersion(Base):
+    """Per-table change counter, bumped by a trigger on every write statement (see database.py)."""
+    __tablename__ = "data_versions"
+
+    table_name = Column(String(63), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,225 @@
+"""
+Local, deterministic mother -> facility / NGO matcher for /mother-match.
+
+The pincode is resolved to a district through its 3-digit sorting-district
+prefix, facilities are found with a grid index over their lat/lon, and the
+income eligibility rules are applied in code. No LLM call is needed; one
+can optionally be used to phrase the reasoning.
+"""
+import math
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from . import reference_data
+from .graph_builder import haversine_matrix
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+PINCODE_FILE = os.path.join(DATA_DIR, "pincode_prefixes.csv")
+
+HIGH_CAPABILITY = 80.0  # facilities at or above this are preferred
+GRID_DEG = 0.5  # spatial index cell size
+KM_PER_DEG_LAT = 111.19
+
+ELIGIBILITY = {
+    "Below 1 Lakh": ("Qualified", 100),
+    "1–2 Lakhs": ("Qualified", 100),
+    "2–3 Lakhs": ("Partially Qualified", 60),
+    "Above 3 Lakhs": ("Not Eligible", 20),
+}
+
+# services_text phrase -> label shown to the mother
+SERVICE_LABELS = [
+    ("neonatal icu", "NICU"),
+    ("emergency obstetric", "24/7 Emergency Obstetric Care"),
+    ("high-risk pregnancy", "High-Risk Pregnancy Monitoring"),
+    ("maternal delivery", "Maternal Delivery"),
+    ("ob-gyn", "OB-GYN"),
+    ("emergency care", "Emergency Care"),
+    ("prenatal", "Prenatal Checkups"),
+    ("postnatal", "Postnatal Care"),
+    ("immunization", "Immunization"),
+    ("vaccination", "Immunization"),
+    ("telemedicine", "Telemedicine"),
+    ("referral", "Referral Services"),
+    ("community health camps", "Community Health Camps"),
+]
+
+
+class GridIndex:
+    """Buckets points into GRID_DEG cells; nearest() searches outward ring by ring."""
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray):
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        for i, (lat, lon) in enumerate(zip(self.lats, self.lons)):
+            self.cells.setdefault(self._cell(lat, lon), []).append(i)
+        self.max_abs_lat = float(np.abs(self.lats).max()) if len(self.lats) else 0.0
+
+    @staticmethod
+    def _cell(lat, lon):
+        return int(math.floor(lat / GRID_DEG)), int(math.floor(lon / GRID_DEG))
+
+    def _rank(self, found, lat, lon, k):
+        dists = haversine_matrix(np.array([lat]), np.array([lon]), self.lats[found], self.lons[found])[0]
+        order = np.argsort(dists, kind="stable")[:k]
+        return [(found[o], float(dists[o])) for o in order]
+
+    def nearest(self, lat: float, lon: float, k: int) -> list[tuple[int, float]]:
+        """Up to k (point index, km) pairs, nearest first."""
+        if not self.cells:
+            return []
+        ci, cj = self._cell(lat, lon)
+        last_ring = max(max(abs(ci - i), abs(cj - j)) for i, j in self.cells)
+        # Conservative km per degree: longitude degrees shrink towards the poles
+        cos_lat = math.cos(math.radians(min(max(self.max_abs_lat, abs(lat)) + GRID_DEG, 89.0)))
+        km_per_deg = KM_PER_DEG_LAT * cos_lat
+
+        found: list[int] = []
+        for ring in range(last_ring + 1):
+            for di in range(-ring, ring + 1):
+                for dj in range(-ring, ring + 1):
+                    if max(abs(di), abs(dj)) == ring:
+                        found.extend(self.cells.get((ci + di, cj + dj), ()))
+            if len(found) >= k:
+                best = self._rank(found, lat, lon, k)
+                # Points beyond this ring are more than ring * GRID_DEG away on some axis
+                if best[-1][1] <= ring * GRID_DEG * km_per_deg:
+                    return best
+        return self._rank(found, lat, lon, k)
+
+
+def specialized_services(services_text: str) -> list[str]:
+    text = str(services_text).lower()
+    labels = []
+    for phrase, label in SERVICE_LABELS:
+        if phrase in text and label not in labels:
+            labels.append(label)
+    return labels
+
+
+def safety_rating(capability_score: float) -> float:
+    if capability_score > 90:
+        return 4.7
+    if capability_score > 80:
+        return 4.5
+    if capability_score > 60:
+        return 4.2
+    return 3.8
+
+
+class MotherMatcher:
+    """
+    Works on the memory-mapped reference tables: numeric columns are views
+    into the map and a match reads only the rows it returns.
+    """
+
+    def __init__(self, facilities: reference_data.ReferenceTable, ngos: reference_data.ReferenceTable,
+                 districts: pd.DataFrame):
+        pins = pd.read_csv(PINCODE_FILE, dtype={"prefix": str})
+        self.pincode_districts = dict(zip(pins["prefix"], pins["district"]))
+
+        locations = reference_data.district_locations()
+        self.canonical = {d: canonical for d, (_, _, canonical) in locations.items()}
+        self.district_coords = {d: (lat, lon) for d, (lat, lon, _) in locations.items()}
+        self.mothers = dict(zip(districts["district"], districts["est_mothers_per_year"]))
+
+        self.facilities = facilities
+        capability = facilities.numeric("capability_score")
+        high = capability >= HIGH_CAPABILITY
+        # Prefer high-capability facilities; fall back to all if there are none
+        self.candidates = np.flatnonzero(high) if high.any() else np.arange(len(facilities))
+        self.candidate_capability = capability[self.candidates]
+        self.index = GridIndex(facilities.numeric("lat")[self.candidates], facilities.numeric("lon")[self.candidates])
+
+        # Canonical district -> row of its most capable NGO (first on ties)
+        self.ngos = ngos
+        ngo_capability = ngos.numeric("capability_score")
+        self.best_ngo: dict[str, int] = {}
+        for row, d in enumerate(ngos.table.column("district").to_pylist()):
+            key = self.canonical.get(d, d)
+            best = self.best_ngo.get(key)
+            if best is None or ngo_capability[row] > ngo_capability[best]:
+                self.best_ngo[key] = row
+        self.ngo_index = GridIndex(ngos.numeric("lat"), ngos.numeric("lon"))
+
+    def resolve_pincode(self, pincode: str) -> Optional[str]:
+        digits = "".join(c for c in str(pincode) if c.isdigit())
+        if len(digits) != 6:
+            return None
+        return self.pincode_districts.get(digits[:3])
+
+    def match(self, mother: dict, k: int = 5) -> Optional[dict]:
+        """The /mother-match response for a mother, or None if her pincode is unknown."""
+        district = self.resolve_pincode(mother.get("pincode", ""))
+        if district is None or district not in self.district_coords:
+            return None
+        lat, lon = self.district_coords[district]
+
+        # Among the k nearest high-capability facilities, the most capable wins (nearest on ties)
+        nearest = self.index.nearest(lat, lon, k)
+        if not nearest:
+            return None
+        pos, distance_km = max(nearest, key=lambda t: (self.candidate_capability[t[0]], -t[1]))
+        facility = self.facilities.row(int(self.candidates[pos]))
+
+        status, support = ELIGIBILITY.get(mother.get("income", ""), ("Partially Qualified", 60))
+
+        # NGO in the same district with the highest capability, else the nearest NGO
+        ngo_row = self.best_ngo.get(district)
+        if ngo_row is None:
+            ngo_nearest = self.ngo_index.nearest(lat, lon, 1)
+            ngo_row = ngo_nearest[0][0] if ngo_nearest else None
+        ngo = self.ngos.row(int(ngo_row)) if ngo_row is not None else None
+
+        if status == "Not Eligible" or ngo is None:
+            program_name = "Self-Pay / Govt Insurance"
+        else:
+            program_name = f"{str(ngo['focus_areas']).split(',')[0].strip()} Program ({ngo['name']})"
+
+        capability = float(facility["capability_score"])
+        proximity = max(0.0, 100.0 - distance_km)  # 1 point per km, floored at 0
+        match_score = int(round(0.6 * capability + 0.25 * proximity + 0.15 * support))
+
+        services = specialized_services(facility["services_text"])
+        mothers = self.mothers.get(district)
+        reasoning = [
+            f"Income ({mother.get('income')}) -> {status}"
+            + (f" for {ngo['name']} support" if status != "Not Eligible" and ngo is not None else "; recommend self-pay or government insurance"),
+            f"{facility['name']} ({facility['type']}) has capability score {capability:.0f} and {int(facility['beds'])} beds, "
+            f"{distance_km:.1f} km from {district}",
+            f"Services: {', '.join(services) if services else facility['services_text']}",
+        ]
+
+        return {
+            "hospital_name": str(facility["name"]),
+            "match_score": min(match_score, 100),
+            "program_name": program_name,
+            "eligibility_status": status,
+            "reasoning": reasoning,
+            "distance_km": round(distance_km, 1),
+            "safety_rating": safety_rating(capability),
+            "beds_count": int(facility["beds"]),
+            "specialized_services": services,
+            "district_impact": (
+                f"Active in {district} district ({int(mothers):,}+ mothers annually)" if mothers
+                else f"Active in {district} district"
+            ),
+        }
+
+
+_loaded = {"version": None, "matcher": None}
+
+
+def get_matcher() -> MotherMatcher:
+    """A matcher over the current reference data, rebuilt when it is reloaded."""
+    version = reference_data.version("facilities", "ngos", "districts", "district_coords")
+    if _loaded["matcher"] is None or version != _loaded["version"]:
+        _loaded["matcher"] = MotherMatcher(
+            reference_data.get("facilities"), reference_data.get("ngos"), reference_data.frame("districts")
+        )
+        _loaded["version"] = version
+    return _loaded["matcher"]
@@ -0,0 +1,68 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A page is ordered by a list of sort keys, all descending, the last of which
+is unique (the primary key). The cursor is the sort-key values of the last
+row served, so the next page is a range condition the database can satisfy
+from an index instead of an OFFSET scan.
+"""
+import base64
+import json
+from typing import Optional
+
+from sqlalchemy import and_, cast, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, n_keys: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(values, list) or len(values) != n_keys:
+        raise InvalidCursor("Cursor does not match this listing")
+    return values
+
+
+def _after(keys, values):
+    """Rows strictly after values in (k1 DESC, k2 DESC, ...) order, NULLs first as Postgres sorts them."""
+    key, value = keys[0], values[0]
+    if value is not None:
+        # Compare in the key's own type so e.g. a real ts_rank equals its round-tripped value
+        value = cast(value, key.type)
+    if len(keys) == 1:
+        return key < value
+    rest = _after(keys[1:], values[1:])
+    if value is None:
+        return or_(key.is_not(None), and_(key.is_(None), rest))
+    return or_(key < value, and_(key == value, rest))
+
+
+def keyset_select(stmt, keys, cursor: Optional[str], limit: int):
+    """
+    stmt restricted to the page after cursor, ordered by keys, with the key
+    values appended to each row and one extra row to detect a next page.
+    Works for sync and async sessions alike.
+    """
+    if cursor:
+        stmt = stmt.where(_after(keys, decode_cursor(cursor, len(keys))))
+    return stmt.add_columns(*keys).order_by(*(k.desc() for k in keys)).limit(limit + 1)
+
+
+def keyset_page(rows, limit: int) -> dict:
+    """{"items": [...], "next_cursor": str or None} from the rows of keyset_select."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1:])
+    return {"items": [row[0] for row in rows], "next_cursor": next_cursor}
@@ -0,0 +1,81 @@
+"""
+Precomputed priority ranking of scored NGOs and facilities.
+
+The ranking is built once, vectorised, and kept sorted by priority score;
+it is rebuilt only when the NGO or facility reference data is reloaded. It
+reads just the columns it shows from the memory-mapped tables; the ranking
+itself (derived scores, sorted) is a small per-worker frame.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from . import reference_data
+
+COLUMNS = ["name", "type", "district", "state", "relevancescore", "priorityscore"]
+
+_loaded = {"fingerprint": None, "ranking": None}
+
+
+def demo_scores(names: pd.Series) -> np.ndarray:
+    """
+    Stable, realistic score between 75 and 98 based on the characters in the
+    name: 75 + (sum of code points % 24), summed over a fixed-width UCS-4 view.
+    """
+    chars = np.array(names.tolist(), dtype=str)
+    width = chars.dtype.itemsize // 4
+    codepoints = chars.view(np.uint32).reshape(len(chars), width) if width else np.zeros((len(chars), 0))
+    return 75 + (codepoints.sum(axis=1, dtype=np.int64) % 24).astype(float)
+
+
+def build_ranking(ngo_table: pa.Table, fac_table: pa.Table) -> pd.DataFrame:
+    """NGOs then facilities, stably sorted by priority score (highest first)."""
+    ngos = ngo_table.select(["name", "district", "state"]).to_pandas()
+    facs = fac_table.select([c for c in ("name", "type", "district") if c in fac_table.column_names]).to_pandas()
+    ngo_rows = pd.DataFrame({
+        "name": ngos["name"].astype(str),
+        "type": "NGO",
+        "district": ngos["district"].astype(str),
+        "state": ngos["state"].astype(str),
+    })
+    fac_rows = pd.DataFrame({
+        "name": facs["name"].astype(str),
+        "type": facs["type"].astype(str) if "type" in facs else "Facility",
+        "district": facs["district"].astype(str),
+        "state": "Andhra Pradesh",
+    })
+    rows = pd.concat([ngo_rows, fac_rows], ignore_index=True)
+    rows["relevancescore"] = rows["priorityscore"] = demo_scores(rows["name"])
+
+    order = np.argsort(-rows["priorityscore"].to_numpy(), kind="stable")
+    ranking = rows.iloc[order].reset_index(drop=True)[COLUMNS]
+    ranking["district_key"] = ranking["district"].str.lower()
+    return ranking
+
+
+def get_ranking() -> pd.DataFrame:
+    fingerprint = reference_data.version("ngos", "facilities")
+    if _loaded["ranking"] is None or fingerprint != _loaded["fingerprint"]:
+        _loaded["ranking"] = build_ranking(reference_data.get("ngos").table, reference_data.get("facilities").table)
+        _loaded["fingerprint"] = fingerprint
+    return _loaded["ranking"]
+
+
+def rank_page(
+    limit: int = 50,
+    offset: int = 0,
+    type: Optional[str] = None,
+    district: Optional[str] = None,
+) -> list[dict]:
+    """A slice of the precomputed ranking, optionally filtered by type / district."""
+    ranking = get_ranking()
+    if type or district:
+        mask = np.ones(len(ranking), dtype=bool)
+        if type:
+            mask &= (ranking["type"] == type).to_numpy()
+        if district:
+            mask &= (ranking["district_key"] == district.lower()).to_numpy()
+        ranking = ranking[mask]
+    return ranking.iloc[offset:offset + limit][COLUMNS].to_dict("records")
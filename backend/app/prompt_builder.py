@@ -0,0 +1,122 @@
+"""
+Compact prompt serialisation: records become pipe-separated tables with a
+single header line, restricted to the fields a task reads, and trimmed
+lowest-score-first (across all tables) until the prompt fits a token budget.
+"""
+import math
+from typing import Callable, Optional
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a ~4 chars/token estimate
+    tiktoken = None
+
+_encodings = {}
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    if tiktoken is not None and model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except Exception:  # unknown model, or the BPE file can't be downloaded
+            _encodings[model] = None
+    encoding = _encodings.get(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+
+def _cell(value) -> str:
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        return f"{value:g}"
+    return " ".join(str(value).replace("|", "/").split())
+
+
+def table(records: list[dict], fields: list[str]) -> str:
+    """'a|b|c' header line, then one pipe-separated line per record."""
+    lines = ["|".join(fields)]
+    lines.extend("|".join(_cell(r.get(f, "")) for f in fields) for r in records)
+    return "\n".join(lines)
+
+
+class PromptBudgetError(ValueError):
+    pass
+
+
+class Section:
+    """
+    One table in a prompt. records must already be ordered best-first.
+    Sections with a score function can be trimmed down to min_rows; the
+    rest are sent whole.
+    """
+
+    def __init__(self, name: str, records: list[dict], fields: list[str],
+                 score: Optional[Callable[[dict], float]] = None, min_rows: int = 1):
+        self.name = name
+        self.records = list(records)
+        self.fields = fields
+        self.score = score
+        self.min_rows = min_rows
+
+    def render(self, skip=()) -> str:
+        """The table, without the rows at positions in skip."""
+        return table([r for i, r in enumerate(self.records) if i not in skip], self.fields)
+
+
+def _sort_score(value) -> float:
+    """Missing scores sort lowest, so those rows are dropped first."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return -math.inf
+    return value
+
+
+def fit_sections(
+    render_prompt,
+    sections: list[Section],
+    budget: Optional[int],
+    model: str = "gpt-4",
+) -> tuple[str, int]:
+    """
+    Render the prompt within budget tokens, dropping the fewest rows: rows
+    of scored sections go lowest score first, across all sections (later
+    rows first on ties), but never below a section's min_rows.
+    render_prompt receives {section name: table text}. Returns (prompt,
+    token count); raises PromptBudgetError if the prompt is over budget
+    even with every section at its floor.
+    """
+    # Every droppable (section, row), in the order rows are given up
+    candidates = sorted(
+        (_sort_score(s.score(r)), -i, n, i)
+        for n, s in enumerate(sections) if s.score is not None
+        for i, r in enumerate(s.records) if i >= s.min_rows
+    )
+    drop_order = [(n, i) for _, _, n, i in candidates]
+
+    def render(dropped: int) -> tuple[str, int]:
+        gone = {}
+        for n, i in drop_order[:dropped]:
+            gone.setdefault(n, set()).add(i)
+        prompt = render_prompt({s.name: s.render(gone.get(n, ())) for n, s in enumerate(sections)})
+        return prompt, count_tokens(prompt, model)
+
+    prompt, tokens = render(0)
+    if budget is None or tokens <= budget:
+        return prompt, tokens
+    prompt, tokens = render(len(drop_order))
+    if tokens > budget:
+        raise PromptBudgetError(
+            f"prompt needs {tokens} tokens with every section at its minimum rows; budget is {budget}"
+        )
+
+    # Fewest drops that fit: over budget at lo, within it at hi
+    lo, hi, best = 0, len(drop_order), (prompt, tokens)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        prompt, tokens = render(mid)
+        if tokens <= budget:
+            hi, best = mid, (prompt, tokens)
+        else:
+            lo = mid
+    return best
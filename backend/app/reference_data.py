@@ -0,0 +1,182 @@
+"""
+Columnar, memory-mapped reference data (scored NGOs, facilities, districts,
+district coordinates).
+
+Each CSV is converted once to an uncompressed Arrow IPC file next to it,
+stamped with the CSV's (mtime, size). Workers memory-map that file, so they
+share one page-cache copy instead of each parsing the CSV at import. The
+descending orders the endpoints sort by are stored as extra columns, making
+a top-n a slice rather than a sort. When a CSV changes, the Arrow file is
+rewritten under a temporary name and swapped in with os.replace, and the
+next access picks up the new version.
+
+What is shared: top(), numeric() (zero-copy NumPy views of numeric columns)
+and row() read the map directly. frame() is a private per-worker pandas
+copy, string objects included; it is meant for small tables (districts) and
+offline use. Structures derived from the data, such as the priority ranking
+and the matcher's grid indexes, are built per worker.
+"""
+import json
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# name -> (CSV file, columns to keep a descending order for)
+SOURCES = {
+    "ngos": ("ngos_scored.csv", ("capability_score",)),
+    "facilities": ("facilities_scored.csv", ("capability_score",)),
+    "districts": ("districts_59.csv", ("est_mothers_per_year",)),
+    "district_coords": ("district_coords.csv", ()),
+}
+
+ORDER_PREFIX = "_desc_"
+FINGERPRINT_KEY = b"source_fingerprint"
+
+
+def csv_path(name: str) -> str:
+    return os.path.join(DATA_DIR, SOURCES[name][0])
+
+
+def arrow_path(name: str) -> str:
+    return os.path.splitext(csv_path(name))[0] + ".arrow"
+
+
+def _fingerprint(path: str) -> list[int]:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _stamp(table: pa.Table) -> Optional[list[int]]:
+    metadata = table.schema.metadata or {}
+    return json.loads(metadata[FINGERPRINT_KEY]) if FINGERPRINT_KEY in metadata else None
+
+
+def build_table(name: str) -> pa.Table:
+    """Read name's CSV into an Arrow table with its sort orders and source stamp."""
+    path = csv_path(name)
+    fingerprint = _fingerprint(path)  # taken first: a concurrent edit just triggers another rebuild
+    df = pd.read_csv(path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for key in SOURCES[name][1]:
+        order = np.argsort(-df[key].to_numpy(), kind="stable").astype(np.int32)
+        table = table.append_column(ORDER_PREFIX + key, pa.array(order))
+    return table.replace_schema_metadata({FINGERPRINT_KEY: json.dumps(fingerprint)})
+
+
+def convert(name: str) -> pa.Table:
+    """Rebuild name's Arrow file atomically; returns the table that was written."""
+    table = build_table(name)
+    dest = arrow_path(name)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, dest)
+    return table
+
+
+def _read(path: str) -> Optional[pa.Table]:
+    try:
+        # The table's buffers point into the map and keep it alive
+        return pa.ipc.open_file(pa.memory_map(path)).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+
+class ReferenceTable:
+    """One loaded version of a reference table."""
+
+    def __init__(self, table: pa.Table):
+        self.fingerprint = _stamp(table)
+        self.orders = {
+            c[len(ORDER_PREFIX):]: table.column(c).to_numpy()
+            for c in table.column_names if c.startswith(ORDER_PREFIX)
+        }
+        self.table = table.select([c for c in table.column_names if not c.startswith(ORDER_PREFIX)])
+        self._frame = None
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def numeric(self, column: str) -> np.ndarray:
+        """A numeric column as a read-only view into the map (copied only if it has nulls)."""
+        values = self.table.column(column)
+        if values.num_chunks == 1 and values.null_count == 0:
+            return values.chunk(0).to_numpy(zero_copy_only=True)
+        return values.to_numpy()
+
+    def row(self, i: int) -> dict:
+        return self.table.slice(i, 1).to_pylist()[0]
+
+    def frame(self) -> pd.DataFrame:
+        """The table as a private DataFrame copy, built once per version. Treat as read-only."""
+        if self._frame is None:
+            self._frame = self.table.to_pandas()
+        return self._frame
+
+    def top(self, by: str, n: int) -> list[dict]:
+        """The n rows with the highest `by`, as records (file order on ties)."""
+        return self.table.take(self.orders[by][:n]).to_pylist()
+
+
+_tables: dict[str, ReferenceTable] = {}
+_lock = threading.Lock()
+
+
+def _load(name: str, fingerprint: list[int]) -> ReferenceTable:
+    table = _read(arrow_path(name))
+    if table is None or _stamp(table) != fingerprint:
+        try:
+            convert(name)
+            table = _read(arrow_path(name))
+        except OSError:  # read-only data dir: serve from memory
+            table = None
+        if table is None:
+            table = build_table(name)
+    return ReferenceTable(table)
+
+
+def get(name: str) -> ReferenceTable:
+    """Current version of a reference table, reloading it if its CSV changed."""
+    fingerprint = _fingerprint(csv_path(name))
+    current = _tables.get(name)
+    if current is None or current.fingerprint != fingerprint:
+        with _lock:
+            current = _tables.get(name)
+            if current is None or current.fingerprint != fingerprint:
+                current = _tables[name] = _load(name, fingerprint)
+    return current
+
+
+def frame(name: str) -> pd.DataFrame:
+    return get(name).frame()
+
+
+def top(name: str, by: str, n: int) -> list[dict]:
+    return get(name).top(by, n)
+
+
+def version(*names: str) -> tuple:
+    """Fingerprints of the given tables; changes whenever one of them is reloaded."""
+    return tuple(tuple(get(name).fingerprint) for name in names)
+
+
+_locations = {"version": None, "table": None}
+
+
+def district_locations() -> dict[str, tuple[float, float, str]]:
+    """district (including legacy spellings) -> (lat, lon, canonical district name)"""
+    current = version("district_coords")
+    if _locations["table"] is None or current != _locations["version"]:
+        coords = frame("district_coords")
+        _locations["table"] = {
+            r.district: (float(r.lat), float(r.lon), r.alias_of if isinstance(r.alias_of, str) and r.alias_of else r.district)
+            for r in coords.itertuples(index=False)
+        }
+        _locations["version"] = current
+    return _locations["table"]
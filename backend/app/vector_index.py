@@ -0,0 +1,106 @@
+"""In-memory cosine-similarity index over NGO embeddings for /match-ngos."""
+import threading
+from typing import NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .models import NGO, DataVersion
+
+
+class Snapshot(NamedTuple):
+    """One build of the index; never mutated, so its arrays always line up."""
+    ids: np.ndarray
+    districts: np.ndarray
+    states: np.ndarray
+    matrix: np.ndarray
+
+
+EMPTY = Snapshot(
+    np.empty(0, dtype=np.int64),
+    np.empty(0, dtype=object),
+    np.empty(0, dtype=object),
+    np.empty((0, 0), dtype=np.float32),
+)
+
+
+class NGOEmbeddingIndex:
+    """
+    Pre-normalised float32 matrix of NGO embeddings plus parallel id /
+    district / state arrays. A query is one matrix-vector product and an
+    argpartition top-k; filters are boolean masks over the rows.
+
+    The index is rebuilt when the ngos row in data_versions changes (a
+    trigger bumps it on every write, from any process), or after
+    invalidate() is called. A rebuild swaps in a whole new Snapshot, so a
+    concurrent search sees either the old arrays or the new ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self.snapshot = EMPTY
+
+    def invalidate(self):
+        self._signature = None
+
+    def refresh(self, db: Session):
+        signature = (
+            db.query(DataVersion.version).filter(DataVersion.table_name == NGO.__tablename__).scalar() or 0
+        )
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            rows = (
+                db.query(NGO.id, NGO.district, NGO.state, NGO.embedding)
+                .filter(NGO.embedding.isnot(None))
+                .order_by(NGO.id)
+                .all()
+            )
+            matrix = np.asarray([r.embedding for r in rows], dtype=np.float32)
+            if rows:
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix /= np.where(norms == 0, 1, norms)
+            self.snapshot = Snapshot(
+                ids=np.array([r.id for r in rows], dtype=np.int64),
+                districts=np.array([(r.district or "").lower() for r in rows], dtype=object),
+                states=np.array([(r.state or "").lower() for r in rows], dtype=object),
+                matrix=np.ascontiguousarray(matrix),
+            )
+            self._signature = signature
+
+    def search(
+        self,
+        query_embedding: list[float],
+        k: int = 10,
+        district: Optional[str] = None,
+        state: Optional[str] = None,
+    ) -> list[int]:
+        """Ids of the k most similar NGOs, best first, within the optional filters."""
+        snap = self.snapshot
+        if len(snap.ids) == 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        sims = snap.matrix @ query
+
+        candidates = np.arange(len(snap.ids))
+        if district or state:
+            mask = np.ones(len(snap.ids), dtype=bool)
+            if district:
+                mask &= snap.districts == district.lower()
+            if state:
+                mask &= snap.states == state.lower()
+            candidates = candidates[mask]
+
+        if len(candidates) > k:
+            top = np.argpartition(-sims[candidates], k - 1)[:k]
+            candidates = candidates[top]
+        best_first = candidates[np.argsort(-sims[candidates], kind="stable")]
+        return snap.ids[best_first].tolist()
+
+
+ngo_index = NGOEmbeddingIndex()
@@ -0,0 +1,83 @@
+"""
+Benchmark: CARE_CHAIN edge construction, nested geodesic loop vs the
+district-bucketed vectorised builder in app.graph_builder.
+
+Run from the backend root:
+    python -m benchmarks.care_chain --ngos 10000 --facs 10000
+"""
+import argparse
+import time
+
+import networkx as nx
+import numpy as np
+from geopy.distance import geodesic
+
+from app.graph_builder import MAX_KM, add_care_chain_edges
+
+N_DISTRICTS = 59
+# Rough bounding box of Andhra Pradesh + Telangana
+LAT_RANGE = (12.6, 19.9)
+LON_RANGE = (76.7, 84.8)
+
+
+def synthetic_graph(n_ngos, n_facs, seed=42):
+    rng = np.random.default_rng(seed)
+    G = nx.Graph()
+    for kind, prefix, count in (("NGO", "ngo", n_ngos), ("FACILITY", "fac", n_facs)):
+        lats = rng.uniform(*LAT_RANGE, count)
+        lons = rng.uniform(*LON_RANGE, count)
+        districts = rng.integers(0, N_DISTRICTS, count)
+        for i in range(count):
+            G.add_node(
+                f"{prefix}_{i}",
+                kind=kind,
+                district=f"District_{districts[i]}",
+                lat=float(lats[i]),
+                lon=float(lons[i]),
+            )
+    return G
+
+
+def legacy_care_chain_edges(G, ngo_nodes, fac_nodes):
+    for n in ngo_nodes:
+        nd = G.nodes[n]
+        for f in fac_nodes:
+            fd = G.nodes[f]
+            if nd["district"] != fd["district"]:
+                continue
+            dist_km = geodesic((nd["lat"], nd["lon"]), (fd["lat"], fd["lon"])).km
+            if dist_km <= MAX_KM:
+                G.add_edge(n, f, kind="CARE_CHAIN", distance_km=round(dist_km, 1))
+
+
+def timed(builder, n_ngos, n_facs):
+    G = synthetic_graph(n_ngos, n_facs)
+    ngo_nodes = [n for n, d in G.nodes(data=True) if d["kind"] == "NGO"]
+    fac_nodes = [n for n, d in G.nodes(data=True) if d["kind"] == "FACILITY"]
+    start = time.perf_counter()
+    builder(G, ngo_nodes, fac_nodes)
+    return G, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ngos", type=int, default=10000)
+    parser.add_argument("--facs", type=int, default=10000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    G_new, new_s = timed(add_care_chain_edges, args.ngos, args.facs)
+    print(f"vectorised: {new_s:8.2f}s  {G_new.number_of_edges()} edges")
+    if args.skip_legacy:
+        return
+
+    G_old, old_s = timed(legacy_care_chain_edges, args.ngos, args.facs)
+    print(f"legacy:     {old_s:8.2f}s  {G_old.number_of_edges()} edges")
+    print(f"speedup:    {old_s / new_s:8.1f}x")
+
+    same = list(G_old.edges(data=True)) == list(G_new.edges(data=True))
+    print(f"identical edges and distance_km: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -61,6 +61,12 @@ export interface ScoreResult {
   reasoning: string[];
 }
 
+// One page of a keyset-paginated list; pass next_cursor back as `cursor`
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 export interface EmailResult {
   subject: string;
   body: string;
@@ -106,7 +112,10 @@ export const apiService = {
     district?: string;
     type?: string;
     query?: string;
-  }) => api.post<Entity[]>('/search', filters),
+    mode?: 'substring' | 'fulltext';
+    limit?: number;
+    cursor?: string;
+  }) => api.post<Page<Entity>>('/search', filters),
 
   getEntity: (id: number) => api.get<Entity>(`/entities/${id}`),
 
@@ -130,14 +139,15 @@ export const apiService = {
     api.post<ScoreResult>('/score', { entity_id }),
 
   // NGOs
-  getNGOs: (query?: string) => api.get<NGO[]>('/ngos', { params: { query } }),
+  getNGOs: (query?: string, cursor?: string) =>
+    api.get<Page<NGO>>('/ngos', { params: { query, cursor } }),
 
   matchNGOs: (program_description: string) =>
     api.post<NGO[]>('/match-ngos', { program_description }),
 
   // Funders
-  getFunders: (filters?: { type?: string; geography?: string }) =>
-    api.get<Funder[]>('/funders', { params: filters }),
+  getFunders: (filters?: { type?: string; geography?: string; query?: string; cursor?: string }) =>
+    api.get<Page<Funder>>('/funders', { params: filters }),
 
   // Priority
   getPriorityRanking: () => api.get<Entity[]>('/priority-ranking'),
@@ -146,6 +156,44 @@ export const apiService = {
   generateEmail: (organization_name: string, type: string) =>
     api.post<EmailResult>('/generate-email', { organization_name, type }),
 
+  // Streams the email as it is written; resolves with the final subject/body
+  streamEmail: async (
+    organization_name: string,
+    type: string,
+    onToken: (text: string) => void,
+    signal?: AbortSignal,
+  ): Promise<EmailResult> => {
+    const res = await fetch(`${API_BASE}/generate-email/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ organization_name, type }),
+      signal,
+    });
+    if (!res.ok || !res.body) throw new Error(`Email stream failed: ${res.status}`);
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let end;
+      while ((end = buffer.indexOf('\n\n')) !== -1) {
+        const message = buffer.slice(0, end);
+        buffer = buffer.slice(end + 2);
+        const event = message.match(/^event: (.*)$/m)?.[1];
+        const data = message.match(/^data: (.*)$/m)?.[1];
+        if (!event || data === undefined) continue;
+        const payload = JSON.parse(data);
+        if (event === 'token') onToken(payload.text);
+        else if (event === 'email') return payload as EmailResult;
+        else if (event === 'error') throw new Error(payload.detail);
+      }
+    }
+    throw new Error('Email stream ended without a result');
+  },
+
   // Heatmap
   getHeatmap: () => api.get<HeatmapData[]>('/heatmap'),
 
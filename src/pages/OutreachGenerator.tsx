@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { motion } from 'framer-motion';
 import {
   Mail,
@@ -133,6 +133,7 @@ export default function OutreachGenerator() {
   const [copied, setCopied] = useState(false);
   const [editing, setEditing] = useState(false);
   const [editedBody, setEditedBody] = useState('');
+  const streamRef = useRef<AbortController | null>(null);
 
   // Check URL params
   useEffect(() => {
@@ -143,16 +144,32 @@ export default function OutreachGenerator() {
     if (type) setSelectedType(type);
   }, []);
 
+  // Stop an in-flight stream when leaving the page
+  useEffect(() => () => streamRef.current?.abort(), []);
+
   const handleGenerate = async () => {
     if (!selectedOrg) return;
+    // Only the latest stream may update the draft
+    streamRef.current?.abort();
+    const controller = new AbortController();
+    streamRef.current = controller;
     setGenerating(true);
     setEmail(null);
     setEditing(false);
     try {
-      const res = await apiService.generateEmail(selectedOrg, selectedType);
-      setEmail(res.data);
-      setEditedBody(res.data.body);
+      let draft = '';
+      const result = await apiService.streamEmail(selectedOrg, selectedType, (text) => {
+        if (controller.signal.aborted) return;
+        draft += text;
+        const [first, ...rest] = draft.split('\n');
+        setEmail(first.startsWith('Subject:')
+          ? { subject: first.slice('Subject:'.length).trim(), body: rest.join('\n').trim() }
+          : { subject: '', body: draft });
+      }, controller.signal);
+      setEmail(result);
+      setEditedBody(result.body);
     } catch {
+      if (controller.signal.aborted) return;
       // Use template
       const template = emailTemplates[selectedType] ||
         emailTemplates['Private Hospital'];
@@ -167,7 +184,10 @@ export default function OutreachGenerator() {
       setEmail(customized);
       setEditedBody(customized.body);
     } finally {
-      setGenerating(false);
+      if (streamRef.current === controller) {
+        streamRef.current = null;
+        setGenerating(false);
+      }
     }
   };
 
@@ -296,7 +316,7 @@ export default function OutreachGenerator() {
             </div>
           )}
 
-          {generating && (
+          {generating && !email && (
             <div
               className="card p-12 flex flex-col items-center justify-center text-center h-full"
               style={{ minHeight: 300 }}
@@ -307,7 +327,7 @@ export default function OutreachGenerator() {
             </div>
           )}
 
-          {email && !generating && (
+          {email && (
             <motion.div
               initial={{ opacity: 0, y: 10 }}
               animate={{ opacity: 1, y: 0 }}
@@ -323,22 +343,40 @@ export default function OutreachGenerator() {
                   <div className="flex gap-2">
                     <button
                       onClick={() => setEditing(!editing)}
+                      disabled={generating}
                       className="flex items-center gap-1 px-2.5 py-1.5 rounded-lg text-xs"
-                      style={{ background: editing ? '#f0fdfa' : '#f1f5f9', color: editing ? '#0d9488' : '#64748b' }}
+                      style={{
+                        background: editing ? '#f0fdfa' : '#f1f5f9',
+                        color: editing ? '#0d9488' : '#64748b',
+                        opacity: generating ? 0.5 : 1,
+                        cursor: generating ? 'not-allowed' : 'pointer',
+                      }}
                     >
                       <Edit3 size={11} /> {editing ? 'Preview' : 'Edit'}
                     </button>
                     <button
                       onClick={handleGenerate}
+                      disabled={generating}
                       className="flex items-center gap-1 px-2.5 py-1.5 rounded-lg text-xs"
-                      style={{ background: '#f1f5f9', color: '#64748b' }}
+                      style={{
+                        background: '#f1f5f9',
+                        color: '#64748b',
+                        opacity: generating ? 0.5 : 1,
+                        cursor: generating ? 'not-allowed' : 'pointer',
+                      }}
                     >
                       <RefreshCw size={11} /> Regenerate
                     </button>
                     <button
                       onClick={handleCopy}
+                      disabled={generating}
                       className="flex items-center gap-1 px-2.5 py-1.5 rounded-lg text-xs font-medium"
-                      style={{ background: copied ? '#f0fdf4' : '#0d9488', color: copied ? '#059669' : 'white' }}
+                      style={{
+                        background: copied ? '#f0fdf4' : '#0d9488',
+                        color: copied ? '#059669' : 'white',
+                        opacity: generating ? 0.5 : 1,
+                        cursor: generating ? 'not-allowed' : 'pointer',
+                      }}
                     >
                       {copied ? <Check size={11} /> : <Copy size={11} />}
                       {copied ? 'Copied!' : 'Copy'}
@@ -396,8 +434,14 @@ export default function OutreachGenerator() {
                   href={`mailto:${selectedEmail}?subject=${encodeURIComponent(email.subject)}&body=${encodeURIComponent(editing ? editedBody : email.body)}`}
                   target="_blank"
                   rel="noopener noreferrer"
+                  aria-disabled={generating}
                   className="flex items-center gap-1.5 px-3 py-1.5 rounded-lg text-xs font-semibold text-white"
-                  style={{ background: '#0d9488', textDecoration: 'none' }}
+                  style={{
+                    background: '#0d9488',
+                    textDecoration: 'none',
+                    opacity: generating ? 0.5 : 1,
+                    pointerEvents: generating ? 'none' : 'auto',
+                  }}
                 >
                   <Send size={11} /> Open in Mail
                 </a>